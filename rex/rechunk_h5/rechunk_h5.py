@@ -1,28 +1,45 @@
 """
 Module to rechunk existing .h5 files
 """
+import concurrent.futures as cf
+from copy import deepcopy
+from functools import lru_cache
 import h5py
 import logging
 import numpy as np
+import os
 import pandas as pd
 from pandas.api.types import CategoricalDtype
+import queue
+import sys
+import threading
 import time
 from warnings import warn
 
+from rex.resource import Resource
+
 logger = logging.getLogger(__name__)
+NATIVE_BYTEORDER = '<' if sys.byteorder == 'little' else '>'
+# Maximum number of hash slots in a raw data chunk cache, HDF5 allocates
+# the slot array when the dataset is opened
+RDCC_MAX_NSLOTS = 100000
 
 
-def get_dataset_attributes(h5_file, out_json=None):
+@lru_cache(maxsize=16)
+def _scrape_dataset_attributes(h5_file, mtime, size):
     """
-    Extact attributes, dtype, and chunk size for all datasets in .h5 file
+    Scrape attributes, dtype, and chunk size for all datasets in .h5 file,
+    cached on the file's path, modification time, and size so that each
+    version of a file is only walked once
 
     Parameters
     ----------
     h5_file : str
-        Path to source h5 file to scrape dataset data from
-    out_json : str, optional
-        Path to output json to save DataFrame of dataset attributes to,
-        by default None
+        Absolute path to source h5 file to scrape dataset data from
+    mtime : float
+        Modification time of h5_file
+    size : int
+        Size of h5_file in bytes
 
     Returns
     -------
@@ -30,18 +47,22 @@ def get_dataset_attributes(h5_file, out_json=None):
         Attributes (attrs, dtype, chunks) for all datasets in source .h5 file
     """
     attrs_list = []
-    with h5py.File(h5_file, 'r') as f:
-        datasets = list(f)
+    with Resource(h5_file) as f:
+        datasets = list(f.h5)
         for ds_name in datasets:
-            ds = f[ds_name]
+            if ds_name == Resource.META_COLUMNS and 'meta' not in f.h5:
+                # meta stored as one dataset per column
+                ds_name = 'meta'
+
             try:
-                attrs = dict(ds.attrs)
+                attrs = f.get_attrs(ds_name)
                 if not attrs:
                     attrs = None
 
+                _, dtype, chunks = f.get_dset_properties(ds_name)
                 ds_attrs = {'attrs': attrs,
-                            'dtype': ds.dtype.name,
-                            'chunks': ds.chunks}
+                            'dtype': dtype.name,
+                            'chunks': chunks}
                 ds_attrs = pd.Series(ds_attrs)
                 ds_attrs.name = ds_name
                 attrs_list.append(ds_attrs.to_frame().T)
@@ -49,6 +70,35 @@ def get_dataset_attributes(h5_file, out_json=None):
                 pass
 
     ds_attrs = pd.concat(attrs_list)
+
+    return ds_attrs
+
+
+def get_dataset_attributes(h5_file, out_json=None):
+    """
+    Extact attributes, dtype, and chunk size for all datasets in .h5 file
+
+    Parameters
+    ----------
+    h5_file : str
+        Path to source h5 file to scrape dataset data from
+    out_json : str, optional
+        Path to output json to save DataFrame of dataset attributes to,
+        by default None
+
+    Returns
+    -------
+    ds_attrs : pandas.DataFrame
+        Attributes (attrs, dtype, chunks) for all datasets in source .h5 file
+    """
+    h5_file = os.path.abspath(h5_file)
+    ds_attrs = _scrape_dataset_attributes(h5_file,
+                                          os.path.getmtime(h5_file),
+                                          os.path.getsize(h5_file))
+    # copy the attrs dictionaries so that callers can modify them without
+    # changing the cached DataFrame
+    ds_attrs = ds_attrs.copy()
+    ds_attrs['attrs'] = [deepcopy(attrs) for attrs in ds_attrs['attrs']]
     if out_json is not None:
         ds_attrs.to_json(out_json)
 
@@ -83,6 +133,187 @@ def get_chunk_slices(ds_dim, chunk_size):
     return chunks
 
 
+def get_aligned_size(process_size, src_chunk=None, dst_chunk=None):
+    """
+    Round process size up so that process slices line up with the source
+    and destination chunk boundaries along the processed axis. Process size
+    is not rounded for sources without chunks or with source chunks more
+    than twice the process size, so that it keeps bounding the memory used
+    by each process slice
+
+    Parameters
+    ----------
+    process_size : int
+        Requested number of rows or columns to process at a time
+    src_chunk : int, optional
+        Source chunk size along the processed axis, by default None
+    dst_chunk : int, optional
+        Destination chunk size along the processed axis, by default None
+
+    Returns
+    -------
+    process_size : int
+        Process size that is a multiple of both chunk sizes if that is no
+        more than twice the requested size, else a multiple of the source
+        chunk size so that each source chunk is only decompressed once.
+        Unchanged if src_chunk is None or more than twice process_size.
+    """
+    if src_chunk and src_chunk <= 2 * process_size:
+        step = src_chunk
+        if dst_chunk:
+            lcm = int(np.lcm(src_chunk, dst_chunk))
+            if lcm <= 2 * process_size:
+                step = lcm
+
+        process_size = int(np.ceil(process_size / step) * step)
+
+    return process_size
+
+
+def get_src_chunk_slices(ds_in, axis, process_size, dst_chunk=None):
+    """
+    Create list of process slices [(s_i, e_i), ...] along axis of ds_in
+    that are built from whole source chunks, using ds_in.iter_chunks() to
+    find the chunk boundaries so that every source chunk is read exactly
+    once. Sources without chunks, or with chunks more than twice
+    process_size along axis, are split into process_size slices so that
+    process_size still bounds the size of each slice.
+
+    Parameters
+    ----------
+    ds_in : h5py.Dataset
+        Source dataset
+    axis : int
+        Axis that is being processed
+    process_size : int
+        Requested number of rows or columns to process at a time
+    dst_chunk : int, optional
+        Destination chunk size along the processed axis, by default None
+
+    Returns
+    -------
+    slices : list
+        List of process slice start and end positions
+        [(s_i, e_i), (s_i+1, e_i+1), ...]
+    """
+    src_chunk = ds_in.chunks[axis] if ds_in.chunks else None
+    process_size = get_aligned_size(process_size, src_chunk=src_chunk,
+                                    dst_chunk=dst_chunk)
+    if src_chunk is None or process_size % src_chunk:
+        slices = get_chunk_slices(ds_in.shape[axis], process_size)
+    else:
+        # number of source chunks to gather into each process slice
+        n_chunks = process_size // src_chunk
+        sel = tuple(slice(0, d) if i == axis else slice(0, 1)
+                    for i, d in enumerate(ds_in.shape))
+        bounds = [chunk[axis] for chunk in ds_in.iter_chunks(sel)]
+        slices = [(bounds[i].start, bounds[i:i + n_chunks][-1].stop)
+                  for i in range(0, len(bounds), n_chunks)]
+
+    return slices
+
+
+def get_chunk_shape(shape, itemsize, target=1 << 20, access='time_major'):
+    """
+    Get chunk shape for a (time, sites) dataset that targets a given chunk
+    size in bytes
+
+    Parameters
+    ----------
+    shape : tuple
+        Dataset shape (time, sites) or (sites, )
+    itemsize : int
+        Number of bytes per dataset element
+    target : int, optional
+        Target chunk size in bytes, by default 1 MB
+    access : str, optional
+        Expected access pattern, 'time_major' fills each chunk with all
+        sites for as many timesteps as fit, 'site_major' fills each chunk
+        with the full timeseries of as many sites as fit,
+        by default 'time_major'
+
+    Returns
+    -------
+    chunks : tuple
+        Chunk shape, no larger than shape
+    """
+    if access not in ('time_major', 'site_major'):
+        msg = ("access must be 'time_major' or 'site_major', not {}"
+               .format(access))
+        logger.error(msg)
+        raise ValueError(msg)
+
+    n_items = max(1, target // itemsize)
+    if len(shape) == 1:
+        chunks = (min(shape[0], n_items), )
+    else:
+        n_rows, n_cols = shape
+        if access == 'time_major':
+            rows = min(n_rows, max(1, n_items // n_cols))
+            cols = min(n_cols, max(1, n_items // rows))
+        else:
+            cols = min(n_cols, max(1, n_items // n_rows))
+            rows = min(n_rows, max(1, n_items // cols))
+
+        chunks = (rows, cols)
+
+    return chunks
+
+
+def get_prime(n):
+    """
+    Get the smallest prime number greater than or equal to n, used to size
+    the number of hash slots in the HDF5 raw data chunk cache
+
+    Parameters
+    ----------
+    n : int
+        Minimum value
+
+    Returns
+    -------
+    n : int
+        Prime number >= n
+    """
+    n = max(int(n), 2)
+    while any(n % i == 0 for i in range(2, int(n**0.5) + 1)):
+        n += 1
+
+    return n
+
+
+def open_dset_with_cache(h5, dset_name, nbytes, chunk_bytes, w0=0.75):
+    """
+    Open dataset with its own raw data chunk cache. The dataset must not
+    already be open, else HDF5 re-uses the existing dataset and its cache.
+
+    Parameters
+    ----------
+    h5 : h5py.File
+        Open .h5 file
+    dset_name : str
+        Dataset to open
+    nbytes : int
+        Size of the raw data chunk cache in bytes
+    chunk_bytes : int
+        Size of a single dataset chunk in bytes, used to size the number of
+        hash slots in the cache, which is capped at RDCC_MAX_NSLOTS
+    w0 : float, optional
+        Chunk preemption policy, by default 0.75
+
+    Returns
+    -------
+    ds : h5py.Dataset
+        Open dataset instance
+    """
+    nslots = get_prime(min(100 * nbytes // chunk_bytes, RDCC_MAX_NSLOTS))
+    dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+    dapl.set_chunk_cache(nslots, nbytes, w0)
+    ds_id = h5py.h5d.open(h5.id, dset_name.encode(), dapl=dapl)
+
+    return h5py.Dataset(ds_id)
+
+
 def get_dtype(col):
     """
     Get column dtype for converstion to records array
@@ -135,27 +366,32 @@ def to_records_array(df):
     numpy.rec.array
         Records array of input df
     """
-    meta_arrays = []
-    dtypes = []
-    for c_name, c_data in df.iteritems():
-        dtype = get_dtype(c_data)
-
-        if np.issubdtype(dtype, np.bytes_):
-            data = c_data.astype(str).str.encode('utf-8').values
-        else:
-            data = c_data.values
+    dtypes = np.dtype([(c_name, get_dtype(c_data))
+                       for c_name, c_data in df.items()])
+    meta_arr = np.empty(len(df), dtype=dtypes)
+    for c_name, c_data in df.items():
+        data = c_data.to_numpy()
+        if np.issubdtype(dtypes[c_name], np.bytes_):
+            data = np.char.encode(data.astype(str), 'utf-8')
 
-        arr = np.array(data, dtype=dtype)
-        meta_arrays.append(arr)
-        dtypes.append((c_name, dtype))
+        meta_arr[c_name] = data
 
-    return np.core.records.fromarrays(meta_arrays, dtype=dtypes)
+    return meta_arr.view(np.recarray)
 
 
 class RechunkH5:
     """
     Class to create new .h5 file with new chunking
     """
+    # Maximum raw data chunk cache for each source dataset
+    SRC_RDCC_NBYTES = 64 * 1024**2
+    # Maximum raw data chunk cache for each destination dataset
+    DST_RDCC_NBYTES = 256 * 1024**2
+    # Maximum number of read slabs waiting to be written, up to
+    # WRITE_QUEUE_SIZE + 2 slabs are held in memory at once: one being
+    # read, the queued slabs, and one being written
+    WRITE_QUEUE_SIZE = 1
+
     def __init__(self, h5_src, h5_dst, version=None):
         """
         Initalize class object
@@ -203,8 +439,8 @@ class RechunkH5:
         list
         """
         if self._src_dsets is None:
-            with h5py.File(self._src_path, mode='r') as f:
-                self._src_dsets = list(f)
+            with Resource(self._src_path) as f:
+                self._src_dsets = f.datasets
 
         return self._src_dsets
 
@@ -370,6 +606,186 @@ class RechunkH5:
 
         return data
 
+    @classmethod
+    def _open_src_dset(cls, f_in, dset_name):
+        """
+        Open source dataset with a raw data chunk cache that can hold the
+        column of source chunks on the edge of a process slab, capped at
+        SRC_RDCC_NBYTES, so that chunks shared by two slabs are not
+        decompressed twice. Slabs are read with a single read_direct call
+        so chunks inside a slab are only read once without the cache.
+
+        Parameters
+        ----------
+        f_in : h5py.File
+            Open source .h5 file
+        dset_name : str
+            Dataset to open
+
+        Returns
+        -------
+        ds_in : h5py.Dataset
+            Open dataset instance for source data
+        """
+        ds_in = f_in[dset_name]
+        chunks = ds_in.chunks
+        if chunks is not None and len(chunks) == 2:
+            chunk_bytes = int(np.prod(chunks)) * ds_in.dtype.itemsize
+            n_chunks = int(np.ceil(ds_in.shape[0] / chunks[0]))
+            nbytes = min(cls.SRC_RDCC_NBYTES, n_chunks * chunk_bytes)
+            nbytes = max(nbytes, chunk_bytes)
+            # the dataset has to be closed for the new chunk cache to be
+            # used when it is re-opened
+            del ds_in
+            ds_in = open_dset_with_cache(f_in, dset_name, nbytes,
+                                         chunk_bytes, w0=1.0)
+
+        return ds_in
+
+    @staticmethod
+    def _memmap_src_dset(ds_in):
+        """
+        Memory map a contiguous, native byte order, numeric source dataset
+        so that it can be read without copying through the HDF5 library
+
+        Parameters
+        ----------
+        ds_in : h5py.Dataset
+            Open dataset instance for source data
+
+        Returns
+        -------
+        src_mmap : numpy.memmap | NoneType
+            Read only memory map of the source data, None if ds_in can't
+            be memory mapped
+        """
+        src_mmap = None
+        dtype = ds_in.dtype
+        offset = ds_in.id.get_offset()
+        mappable = (offset is not None
+                    and ds_in.file.driver == 'sec2'
+                    and ds_in.id.get_space().get_simple_extent_type()
+                    == h5py.h5s.SIMPLE
+                    and dtype.kind in 'biuf'
+                    and dtype.byteorder in ('=', '|', NATIVE_BYTEORDER))
+        if mappable:
+            src_mmap = np.memmap(ds_in.file.filename, dtype=dtype, mode='r',
+                                 offset=offset, shape=ds_in.shape)
+
+        return src_mmap
+
+    @staticmethod
+    def _read_slab(ds_in, slab, slab_shape, buffer=None):
+        """
+        Read slab of data from ds_in. Native byte order numeric datasets are
+        read with read_direct into a re-usable buffer, everything else is
+        read with standard slicing.
+
+        Parameters
+        ----------
+        ds_in : h5py.Dataset
+            Open dataset instance for source data
+        slab : tuple
+            Slice of ds_in to read
+        slab_shape : tuple
+            Shape of slab
+        buffer : ndarray, optional
+            Buffer from the previous read to re-use if it is the right shape,
+            by default None
+
+        Returns
+        -------
+        data : ndarray
+            Source data for slab, may be buffer in which case it will be
+            overwritten by the next read
+        """
+        dtype = ds_in.dtype
+        direct = (dtype.kind in 'biuf'
+                  and dtype.byteorder in ('=', '|', NATIVE_BYTEORDER))
+        if direct:
+            if buffer is None or buffer.shape != slab_shape:
+                buffer = np.empty(slab_shape, dtype=dtype)
+
+            ds_in.read_direct(buffer, source_sel=slab)
+            data = buffer
+        else:
+            data = ds_in[slab]
+
+        return data
+
+    @staticmethod
+    def _write_slabs(ds_out, write_queue, errors):
+        """
+        Write (slab, data) pairs from write_queue to ds_out until None is
+        received. Runs in its own thread so that compressing and writing
+        the destination data overlaps with reading the source data.
+
+        Parameters
+        ----------
+        ds_out : h5py.Dataset
+            Open dataset instance for rechunked data
+        write_queue : queue.Queue
+            Queue of (slab, data) pairs to write, terminated by None
+        errors : list
+            List to append any write errors to, the queue is always drained
+            so that the reader can't block on a full queue
+        """
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+
+            if not errors:
+                slab, data = item
+                try:
+                    ds_out.write_direct(data, dest_sel=slab)
+                except Exception as ex:
+                    errors.append(ex)
+
+    @staticmethod
+    def _get_compression_kwargs(compression, compression_opts=None):
+        """
+        Get h5py create_dataset compression kwargs
+
+        Parameters
+        ----------
+        compression : str | int | NoneType
+            Compression filter to use, any filter supported by h5py (e.g.
+            'gzip', 'lzf' or a registered filter id) or 'blosc:<cname>'
+            (e.g. 'blosc:lz4', 'blosc:zstd') to use the byte-shuffled Blosc
+            filter from hdf5plugin, None for no compression
+        compression_opts : int | tuple, optional
+            Compression options (e.g. gzip level or Blosc clevel), Blosc
+            only accepts an int clevel, by default None
+
+        Returns
+        -------
+        kwargs : dict
+            Compression kwargs for create_dataset
+        """
+        kwargs = {}
+        if isinstance(compression, str) and compression.startswith('blosc'):
+            if isinstance(compression_opts, (tuple, list)):
+                msg = ('Blosc compression_opts must be an int clevel, got: {}'
+                       .format(compression_opts))
+                logger.error(msg)
+                raise ValueError(msg)
+
+            import hdf5plugin
+            cname = compression.split(':')[-1]
+            if cname == 'blosc':
+                cname = 'lz4'
+
+            clevel = 5 if compression_opts is None else compression_opts
+            kwargs.update(hdf5plugin.Blosc(cname=cname, clevel=clevel,
+                                           shuffle=hdf5plugin.Blosc.SHUFFLE))
+        elif compression is not None:
+            kwargs['compression'] = compression
+            if compression_opts is not None:
+                kwargs['compression_opts'] = compression_opts
+
+        return kwargs
+
     def init_dset(self, dset_name, dset_shape, dset_attrs):
         """
         Create dataset and add attributes and load data if needed
@@ -381,7 +797,9 @@ class RechunkH5:
         dset_shape : tuple
             Dataset shape
         dset_attrs : dict
-            Dictionary of dataset attributes (dtype, chunks, attrs, name)
+            Dictionary of dataset attributes (dtype, chunks, attrs, name),
+            can also contain compression and compression_opts, see
+            _get_compression_kwargs, by default datasets are not compressed
 
         Returns
         -------
@@ -398,10 +816,15 @@ class RechunkH5:
         if chunks:
             chunks = tuple(chunks)
 
+        compression = self._get_compression_kwargs(
+            dset_attrs.get('compression', None),
+            compression_opts=dset_attrs.get('compression_opts', None))
+
         logger.debug('Creating {} with shape: {}, dtype: {}, chunks: {}'
                      .format(dset_name, dset_shape, dtype, chunks))
         ds = self._dst_h5.create_dataset(dset_name, shape=dset_shape,
-                                         dtype=dtype, chunks=chunks)
+                                         dtype=dtype, chunks=chunks,
+                                         **compression)
         if attrs:
             for attr, value in attrs.items():
                 if attr not in ['freq', 'start']:
@@ -411,6 +834,43 @@ class RechunkH5:
 
         return ds
 
+    def _open_dst_dset(self, dset_name, axis=None):
+        """
+        Open destination dataset for writing. When it is written in slices
+        along axis, 2D chunked datasets are opened with a chunk cache that
+        can hold the chunks along the edge of a slice so that partially
+        written chunks are not evicted. The dataset must not already be
+        open elsewhere and should be closed once it has been written so
+        that its cache is released.
+
+        Parameters
+        ----------
+        dset_name : str
+            Destination dataset name
+        axis : int, optional
+            Axis the dataset is written in slices along, None if it is
+            written in a single call, by default None
+
+        Returns
+        -------
+        ds_out : h5py.Dataset
+            Open dataset instance for rechunked data
+        """
+        ds_out = self._dst_h5[dset_name]
+        chunks = ds_out.chunks
+        if axis is not None and chunks is not None and len(chunks) == 2:
+            chunk_bytes = int(np.prod(chunks)) * ds_out.dtype.itemsize
+            n_chunks = int(np.ceil(ds_out.shape[1 - axis] / chunks[1 - axis]))
+            nbytes = min(self.DST_RDCC_NBYTES, 2 * n_chunks * chunk_bytes)
+            nbytes = max(nbytes, chunk_bytes)
+            # the dataset has to be closed for the new chunk cache to be
+            # used when it is re-opened
+            del ds_out
+            ds_out = open_dset_with_cache(self._dst_h5, dset_name, nbytes,
+                                          chunk_bytes)
+
+        return ds_out
+
     def load_time_index(self, attrs, resolution=None):
         """
         Transfer time_index to rechunked .h5
@@ -460,7 +920,33 @@ class RechunkH5:
         tt = (time.time() - ts) / 60
         logger.debug('\t- {:.2f} minutes'.format(tt))
 
-    def load_meta(self, attrs, meta_path=None):
+    def _load_columnar_meta(self, meta, attrs):
+        """
+        Write meta to rechunked .h5 as a group with one dataset per column so
+        that single columns can be read without reading every record
+
+        Parameters
+        ----------
+        meta : numpy.ndarray
+            Meta data records array
+        attrs : pandas.Series
+            Dataset attributes associated with meta
+        """
+        group = self._dst_h5.create_group(Resource.META_COLUMNS)
+        group.attrs['columns'] = list(meta.dtype.names)
+        if attrs['attrs']:
+            for attr, value in attrs['attrs'].items():
+                group.attrs[attr] = value
+
+        chunks = attrs['chunks']
+        if not chunks:
+            chunks = (max(1, min(len(meta), 1 << 16)), )
+
+        for name in meta.dtype.names:
+            group.create_dataset(name, data=meta[name], chunks=chunks,
+                                 compression='lzf')
+
+    def load_meta(self, attrs, meta_path=None, columnar=False):
         """
         Transfer meta data to rechunked .h5
 
@@ -468,6 +954,12 @@ class RechunkH5:
         ----------
         attrs : pandas.Series
             Dataset attributes associated with meta
+        meta_path : str, optional
+            Path to .csv or .npy file containing meta to load into
+            rechunked .h5 file, by default None
+        columnar : bool, optional
+            Flag to write meta as a group with one dataset per column
+            instead of a single records dataset, by default False
         """
         ts = time.time()
         logger.info('Rechunking meta')
@@ -480,15 +972,22 @@ class RechunkH5:
                 meta = np.load(meta_path)
 
         if meta is None:
-            with h5py.File(self._src_path, 'r') as f:
-                meta = f['meta'][...]
+            with Resource(self._src_path) as f:
+                if 'meta' in f.h5:
+                    meta = f.h5['meta'][...]
+                else:
+                    meta = to_records_array(f.meta)
 
         if isinstance(attrs['chunks'], int):
             attrs['chunks'] = (attrs['chunks'], )
 
-        attrs['dtype'] = meta.dtype
-        ds = self.init_dset('meta', meta.shape, attrs)
-        ds[...] = meta
+        if columnar:
+            self._load_columnar_meta(meta, attrs)
+        else:
+            attrs['dtype'] = meta.dtype
+            ds = self.init_dset('meta', meta.shape, attrs)
+            ds[...] = meta
+
         logger.info('- meta transfered')
         tt = (time.time() - ts) / 60
         logger.debug('\t- {:.2f} minutes'.format(tt))
@@ -504,8 +1003,13 @@ class RechunkH5:
         """
         ts = time.time()
         logger.info('Rechunking coordinates')
-        meta_data = self._dst_h5['meta'][...]
-        coords = np.dstack((meta_data['latitude'], meta_data['longitude']))[0]
+        if 'meta' in self._dst_h5:
+            meta_data = self._dst_h5['meta'][...]
+        else:
+            meta_data = self._dst_h5[Resource.META_COLUMNS]
+
+        coords = np.dstack((meta_data['latitude'][...],
+                            meta_data['longitude'][...]))[0]
         attrs['dtype'] = coords.dtype
 
         if isinstance(attrs['chunks'], int):
@@ -518,7 +1022,7 @@ class RechunkH5:
         logger.debug('\t- {:.2f} minutes'.format(tt))
 
     def load_data(self, ds_in, ds_out, shape, dset_attrs, process_size=None,
-                  data=None, reduce=False):
+                  data=None, reduce=False, src_mmap=None):
         """
         Load data from ds_in to ds_out
 
@@ -533,36 +1037,75 @@ class RechunkH5:
         dset_attrs : dict
             Dictionary of dataset attributes (dtype, chunks, attrs)
         process_size : int, optional
-            Size of each chunk to be processed at a time, by default None
+            Size of each chunk to be processed at a time, up to
+            WRITE_QUEUE_SIZE + 2 (3) process slabs are held in memory at
+            once, by default None
         data : ndarray, optional
             Data to load into ds_out, by default None
         reduce : bool, optional
             Reduce temporal resolution, by default False
+        src_mmap : numpy.memmap, optional
+            Memory map of contiguous source data to read from instead of
+            ds_in, by default None
         """
         if process_size is not None and data is None:
-            by_rows = False
-            chunks = ds_in.chunks
-            if isinstance(chunks, tuple):
-                sites = shape[1]
-            else:
-                by_rows = True
-                sites = shape[0]
-
-            slice_map = get_chunk_slices(sites, process_size)
-            for s, e in slice_map:
-                if by_rows:
-                    ds_out[s:e] = self._check_data(ds_in[s:e], dset_attrs)
-                else:
-                    data = ds_in[:, s:e]
-                    if reduce:
+            by_rows = not isinstance(ds_in.chunks, tuple)
+
+            axis = 0 if by_rows else 1
+            dst_chunk = ds_out.chunks[axis] if ds_out.chunks else None
+            slice_map = get_src_chunk_slices(ds_in, axis, process_size,
+                                             dst_chunk=dst_chunk)
+
+            # read buffers are re-used round robin, a buffer is only
+            # re-filled once the writer has finished with it. The next
+            # buffer is only used if the current one was queued, not if
+            # the data was copied by reducing or converting it.
+            buffers = [None] * (self.WRITE_QUEUE_SIZE + 2)
+            j = 0
+            write_queue = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+            errors = []
+            writer = threading.Thread(target=self._write_slabs,
+                                      args=(ds_out, write_queue, errors))
+            writer.start()
+            try:
+                for s, e in slice_map:
+                    if errors:
+                        break
+
+                    if by_rows:
+                        slab = np.s_[s:e]
+                        slab_shape = (e - s, ) + ds_in.shape[1:]
+                    else:
+                        slab = np.s_[:, s:e]
+                        slab_shape = (ds_in.shape[0], e - s)
+
+                    if src_mmap is not None:
+                        data = src_mmap[slab]
+                    else:
+                        buffers[j] = self._read_slab(ds_in, slab, slab_shape,
+                                                     buffer=buffers[j])
+                        data = buffers[j]
+
+                    if reduce and not by_rows:
                         data = data[self.time_slice]
 
-                    ds_out[:, s:e] = self._check_data(data, dset_attrs)
+                    data = np.ascontiguousarray(self._check_data(data,
+                                                                 dset_attrs))
+                    if data is buffers[j]:
+                        j = (j + 1) % len(buffers)
+
+                    write_queue.put((slab, data))
 
-                logger.debug('\t- chunk {}:{} transfered'.format(s, e))
+                    logger.debug('\t- chunk {}:{} transfered'.format(s, e))
+            finally:
+                write_queue.put(None)
+                writer.join()
+
+            if errors:
+                raise errors[0]
         else:
             if data is None:
-                data = ds_in[:]
+                data = ds_in[:] if src_mmap is None else src_mmap[:]
                 if reduce:
                     data = data[self.time_slice]
 
@@ -570,6 +1113,104 @@ class RechunkH5:
             else:
                 ds_out[:] = self._check_data(data, dset_attrs)
 
+    def _init_dst_dset(self, dset_name, dset_attrs, check_attrs=False):
+        """
+        Create destination dataset for given source dataset
+
+        Parameters
+        ----------
+        dset_name : str
+            Dataset to transfer
+        dset_attrs : dict
+            Dictionary of dataset attributes (dtype, chunks, attrs)
+        check_attrs : bool, optional
+            Flag to compare source and specified dataset attributes,
+            by default False
+
+        Returns
+        -------
+        dst_name : str
+            Name of the initialized, closed, destination dataset
+        shape : tuple
+            Dataset shape
+        dset_attrs : dict
+            Checked dictionary of dataset attributes (dtype, chunks, attrs)
+        data : ndarray | NoneType
+            Data to load into ds_out if the source dataset only has a single
+            row, else None
+        reduce : bool
+            Reduce temporal resolution
+        """
+        with h5py.File(self._src_path, 'r') as f_in:
+            ds_in = f_in[dset_name]
+            shape = ds_in.shape
+            data = None
+            if shape[0] == 1:
+                shape = (shape[1], )
+                data = ds_in[0]
+                logger.debug('\t- Reduce Dataset shape to {}'
+                             .format(shape))
+
+            reduce = (self.time_slice is not None
+                      and len(self.time_slice) == shape[0])
+            if reduce:
+                shape = (self.time_slice.sum(), shape[1])
+
+            dset_attrs = self.check_dset_attrs(ds_in, dset_attrs,
+                                               check_attrs=check_attrs)
+            ds_out = self.init_dset(dset_name, shape, dset_attrs)
+            dst_name = ds_out.name
+            del ds_out
+
+        return dst_name, shape, dset_attrs, data, reduce
+
+    def _copy_dset(self, dset_name, dst_name, shape, dset_attrs,
+                   process_size=None, data=None, reduce=False):
+        """
+        Copy data from source dataset into initialized destination dataset,
+        opens its own handle to the source file so that datasets can be
+        copied in parallel threads. The destination dataset is only open,
+        with its chunk cache, while it is being copied.
+
+        Parameters
+        ----------
+        dset_name : str
+            Dataset to transfer
+        dst_name : str
+            Name of initialized destination dataset
+        shape : tuple
+            Dataset shape
+        dset_attrs : dict
+            Dictionary of dataset attributes (dtype, chunks, attrs)
+        process_size : int, optional
+            Size of each chunk to be processed at a time, by default None
+        data : ndarray, optional
+            Data to load into ds_out, by default None
+        reduce : bool, optional
+            Reduce temporal resolution, by default False
+        """
+        ts = time.time()
+        with h5py.File(self._src_path, 'r') as f_in:
+            ds_in = self._open_src_dset(f_in, dset_name)
+            src_mmap = None
+            if data is None:
+                src_mmap = self._memmap_src_dset(ds_in)
+
+            axis = None
+            if process_size is not None and data is None:
+                axis = 0 if ds_in.chunks is None else 1
+
+            ds_out = self._open_dst_dset(dst_name, axis=axis)
+            self.load_data(ds_in, ds_out, shape, dset_attrs,
+                           process_size=process_size, data=data,
+                           reduce=reduce, src_mmap=src_mmap)
+            ds_out.flush()
+            del src_mmap, ds_out
+
+        logger.info('- {} transfered'.format(dset_name))
+        tt = (time.time() - ts) / 60
+        logger.debug('\t- {:.2f} minutes'.format(tt))
+
     def load_dset(self, dset_name, dset_attrs, process_size=None,
                   check_attrs=False):
         """
@@ -588,37 +1229,66 @@ class RechunkH5:
             by default False
         """
         if dset_name not in self._dst_h5:
-            ts = time.time()
             logger.info('Rechunking {}'.format(dset_name))
-            with h5py.File(self._src_path, 'r') as f_in:
-                ds_in = f_in[dset_name]
-                shape = ds_in.shape
-                data = None
-                if shape[0] == 1:
-                    shape = (shape[1], )
-                    data = ds_in[0]
-                    logger.debug('\t- Reduce Dataset shape to {}'
-                                 .format(shape))
-
-                reduce = (self.time_slice is not None
-                          and len(self.time_slice) == shape[0])
-                if reduce:
-                    shape = (self.time_slice.sum(), shape[1])
+            dst_name, shape, dset_attrs, data, reduce = \
+                self._init_dst_dset(dset_name, dset_attrs,
+                                    check_attrs=check_attrs)
+            self._copy_dset(dset_name, dst_name, shape, dset_attrs,
+                            process_size=process_size, data=data,
+                            reduce=reduce)
+        else:
+            logger.warning('{} already exists in {}'
+                           .format(dset_name, self._dst_path))
 
-                dset_attrs = self.check_dset_attrs(ds_in, dset_attrs,
-                                                   check_attrs=check_attrs)
-                ds_out = self.init_dset(dset_name, shape, dset_attrs)
+    def load_dsets(self, var_attrs, process_size=None, check_attrs=False,
+                   max_workers=1):
+        """
+        Transfer datasets from domain to combined .h5. All destination
+        datasets are created first and then the data is copied, in parallel
+        if max_workers > 1
+
+        Parameters
+        ----------
+        var_attrs : pandas.DataFrame
+            DataFrame mapping variable (dataset) name to .h5 attributes
+        process_size : int, optional
+            Size of each chunk to be processed at a time, by default None
+        check_attrs : bool, optional
+            Flag to compare source and specified dataset attributes,
+            by default False
+        max_workers : int, optional
+            Number of threads to use to copy datasets, None will use up to
+            8 threads, by default 1
+        """
+        copies = []
+        for dset_name, dset_attrs in var_attrs.iterrows():
+            if dset_name not in self._dst_h5:
+                logger.info('Rechunking {}'.format(dset_name))
+                out = self._init_dst_dset(dset_name, dset_attrs,
+                                          check_attrs=check_attrs)
+                copies.append((dset_name, ) + out)
+            else:
+                logger.warning('{} already exists in {}'
+                               .format(dset_name, self._dst_path))
 
-                self.load_data(ds_in, ds_out, shape, dset_attrs,
-                               process_size=process_size, data=data,
-                               reduce=reduce)
+        if max_workers is None:
+            max_workers = min(8, os.cpu_count())
 
-            logger.info('- {} transfered'.format(dset_name))
-            tt = (time.time() - ts) / 60
-            logger.debug('\t- {:.2f} minutes'.format(tt))
+        if max_workers == 1 or len(copies) <= 1:
+            for dset_name, dst_name, shape, dset_attrs, data, reduce in copies:
+                self._copy_dset(dset_name, dst_name, shape, dset_attrs,
+                                process_size=process_size, data=data,
+                                reduce=reduce)
         else:
-            logger.warning('{} already exists in {}'
-                           .format(dset_name, self._dst_path))
+            with cf.ThreadPoolExecutor(max_workers=max_workers) as exe:
+                futures = [exe.submit(self._copy_dset, dset_name, dst_name,
+                                      shape, dset_attrs,
+                                      process_size=process_size, data=data,
+                                      reduce=reduce)
+                           for dset_name, dst_name, shape, dset_attrs, data,
+                           reduce in copies]
+                for future in futures:
+                    future.result()
 
     @staticmethod
     def pop_dset_attrs(var_attrs, dset):
@@ -674,7 +1344,8 @@ class RechunkH5:
         return var_attrs
 
     def rechunk(self, var_attrs, meta=None, process_size=None,
-                check_dset_attrs=False, resolution=None):
+                check_dset_attrs=False, resolution=None, max_workers=1,
+                columnar_meta=False):
         """
         Rechunk all variables in given variable attributes json
 
@@ -687,12 +1358,20 @@ class RechunkH5:
             Path to .csv or .npy file containing meta to load into
             rechunked .h5 file
         process_size : int
-            Size of each chunk to be processed at a time
+            Size of each chunk to be processed at a time, up to
+            WRITE_QUEUE_SIZE + 2 (3) process slabs are held in memory at
+            once per dataset being copied
         check_dset_attrs : bool, optional
             Flag to compare source and specified dataset attributes,
             by default False
         resolution : str, optional
             New time resolution, by default None
+        max_workers : int, optional
+            Number of threads to use to copy datasets, None will use up to
+            8 threads, by default 1
+        columnar_meta : bool, optional
+            Flag to write meta as a group with one dataset per column
+            instead of a single records dataset, by default False
         """
         try:
             ts = time.time()
@@ -720,7 +1399,8 @@ class RechunkH5:
             # Process meta
             if 'meta' in var_attrs.index:
                 var_attrs, meta_attrs = self.pop_dset_attrs(var_attrs, 'meta')
-                self.load_meta(meta_attrs, meta_path=meta)
+                self.load_meta(meta_attrs, meta_path=meta,
+                               columnar=columnar_meta)
 
             # Process coordinates
             if 'coordinates' in var_attrs.index:
@@ -730,10 +1410,9 @@ class RechunkH5:
 
             mask = var_attrs.index.isin(self.src_dsets)
             var_attrs = var_attrs.loc[mask]
-            for dset_name, dset_attrs in var_attrs.iterrows():
-                self.load_dset(dset_name, dset_attrs,
-                               process_size=process_size,
-                               check_attrs=check_dset_attrs)
+            self.load_dsets(var_attrs, process_size=process_size,
+                            check_attrs=check_dset_attrs,
+                            max_workers=max_workers)
 
             tt = (time.time() - ts) / 60
             logger.debug('\t- {:} created in {:.2f} minutes'
@@ -743,7 +1422,8 @@ class RechunkH5:
 
     @classmethod
     def run(cls, h5_src, h5_dst, var_attrs, version=None, meta=None,
-            process_size=None, check_dset_attrs=False, resolution=None):
+            process_size=None, check_dset_attrs=False, resolution=None,
+            max_workers=1, columnar_meta=False):
         """
         Rechunk h5_src to h5_dst using given attributes
 
@@ -762,12 +1442,20 @@ class RechunkH5:
             Path to .csv or .npy file containing meta to load into
             rechunked .h5 file
         process_size : int
-            Size of each chunk to be processed at a time
+            Size of each chunk to be processed at a time, up to
+            WRITE_QUEUE_SIZE + 2 (3) process slabs are held in memory at
+            once per dataset being copied
         check_dset_attrs : bool, optional
             Flag to compare source and specified dataset attributes,
             by default False
         resolution : str, optional
             New time resolution, by default None
+        max_workers : int, optional
+            Number of threads to use to copy datasets, None will use up to
+            8 threads, by default 1
+        columnar_meta : bool, optional
+            Flag to write meta as a group with one dataset per column
+            instead of a single records dataset, by default False
         """
         logger.info('Rechunking {} to {} using chunks given in {}'
                     .format(h5_src, h5_dst, var_attrs))
@@ -775,7 +1463,8 @@ class RechunkH5:
             with cls(h5_src, h5_dst, version=version) as r:
                 r.rechunk(var_attrs, meta=meta, process_size=process_size,
                           check_dset_attrs=check_dset_attrs,
-                          resolution=resolution)
+                          resolution=resolution, max_workers=max_workers,
+                          columnar_meta=columnar_meta)
 
             logger.info('{} complete'.format(h5_dst))
         except Exception:
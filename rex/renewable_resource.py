@@ -305,7 +305,7 @@ class WindResource(Resource):
     """
 
     def __init__(self, h5_file, unscale=True, hsds=False, str_decode=True,
-                 group=None):
+                 group=None, rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
@@ -321,10 +321,18 @@ class WindResource(Resource):
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         self._heights = None
         super().__init__(h5_file, unscale=unscale, hsds=hsds,
-                         str_decode=str_decode, group=group)
+                         str_decode=str_decode, group=group,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
 
     @staticmethod
     def _parse_hub_height(name):
@@ -1203,7 +1211,8 @@ class MultiFileWTK(MultiFileResource, WindResource):
     """
     SUFFIX = 'm.h5'
 
-    def __init__(self, h5_path, unscale=True, str_decode=True):
+    def __init__(self, h5_path, unscale=True, str_decode=True,
+                 rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
@@ -1217,8 +1226,16 @@ class MultiFileWTK(MultiFileResource, WindResource):
         str_decode : bool
             Boolean flag to decode the bytestring meta data into normal
             strings. Setting this to False will speed up the meta data read.
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
-        super().__init__(h5_path, unscale=unscale, str_decode=str_decode)
+        super().__init__(h5_path, unscale=unscale, str_decode=str_decode,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._heights = None
 
     @classmethod
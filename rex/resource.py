@@ -15,6 +15,10 @@ class ResourceDataset:
     """
     h5py.Dataset wrapper for Resource .h5 files
     """
+    # Minimum number of bytes to extract before reading directly into a
+    # pre-allocated array, below this h5py's __getitem__ is faster
+    READ_DIRECT_BYTES = 1024**2
+
     def __init__(self, ds, scale_attr='scale_factor', add_attr='add_offset',
                  unscale=True):
         """
@@ -143,6 +147,68 @@ class ResourceDataset:
 
         return ds_slice, ds_idx
 
+    def _get_out_shape(self, slices):
+        """
+        Get the shape of the array that will be extracted from ds for the
+        given slices
+
+        Parameters
+        ----------
+        slices : tuple
+            Tuple of ints and slices, one per (leading) axis
+
+        Returns
+        -------
+        shape : tuple | NoneType
+            Shape of the extracted array, None if the shape cannot be
+            determined from slices
+        """
+        shape = ()
+        if len(slices) > len(self.shape):
+            return None
+
+        for i, ax_len in enumerate(self.shape):
+            ax_slice = slices[i] if i < len(slices) else slice(None)
+            if isinstance(ax_slice, slice):
+                shape += (len(range(*ax_slice.indices(ax_len))), )
+            elif not isinstance(ax_slice, (int, np.integer)):
+                return None
+
+        return shape
+
+    def _read_direct(self, slices):
+        """
+        Read large slices of ds directly into a pre-allocated array,
+        bypassing the h5py __getitem__ overhead. Falls back to __getitem__
+        for small selections, non-numeric datasets, h5pyd datasets, and
+        selections read_direct can't handle.
+
+        Parameters
+        ----------
+        slices : tuple
+            Tuple of ints and slices, one per (leading) axis
+
+        Returns
+        -------
+        out : ndarray
+            Extracted array of data from ds
+        """
+        shape = None
+        if (isinstance(self._ds, h5py.Dataset)
+                and np.issubdtype(self.dtype, np.number)):
+            shape = self._get_out_shape(slices)
+
+        direct = (shape is not None
+                  and (np.prod(shape) * self.dtype.itemsize
+                       >= self.READ_DIRECT_BYTES))
+        if direct:
+            out = np.empty(shape, dtype=self.dtype)
+            self._ds.read_direct(out, source_sel=slices)
+        else:
+            out = self._ds[slices]
+
+        return out
+
     def _extract_ds_slice(self, ds_slice):
         """
         Extact ds_slice from ds as efficiently as possible.
@@ -165,7 +231,7 @@ class ResourceDataset:
             if ax_idx is not None:
                 idx_slice += (ax_idx,)
 
-        out = self._ds[slices]
+        out = self._read_direct(slices)
         if any(s != slice(None) if isinstance(s, slice) else True
                for s in idx_slice):
             out = out[idx_slice]
@@ -186,13 +252,19 @@ class ResourceDataset:
         data : ndarray
             Unscaled dataset array
         """
-        data = data.astype('float32')
-
-        if self.adder != 0:
-            data *= self.scale_factor
+        if not isinstance(data, np.ndarray):
+            data = data.astype('float32')
+            if self.adder != 0:
+                data *= self.scale_factor
+                data += self.adder
+            else:
+                data /= self.scale_factor
+        elif self.adder != 0:
+            # cast and scale in a single pass into a new float32 array
+            data = np.multiply(data, self.scale_factor, dtype=np.float32)
             data += self.adder
         else:
-            data /= self.scale_factor
+            data = np.divide(data, self.scale_factor, dtype=np.float32)
 
         return data
 
@@ -399,14 +471,25 @@ class Resource:
     SCALE_ATTR = 'scale_factor'
     ADD_ATTR = 'add_offset'
     UNIT_ATTR = 'units'
+    # Default raw data chunk cache, HDF5's default of 1 MB is too small to
+    # hold even a single chunk of most resource datasets
+    RDCC_NBYTES = 256 * 1024**2
+    RDCC_NSLOTS = 12007
+    # Group storing meta as one dataset per column, written by RechunkH5
+    # with columnar_meta=True, read as 'meta'
+    META_COLUMNS = 'meta_columns'
+    # Block size for reading remote (e.g. s3://) files with fsspec, matched
+    # to typical resource chunk sizes to coalesce small range requests
+    FSSPEC_BLOCK_SIZE = 8 * 1024**2
 
     def __init__(self, h5_file, unscale=True, hsds=False, str_decode=True,
-                 group=None):
+                 group=None, rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
         h5_file : str
-            Path to .h5 resource file
+            Path to .h5 resource file, remote files (e.g. s3://bucket/file.h5)
+            are opened with fsspec
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         hsds : bool
@@ -417,13 +500,38 @@ class Resource:
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         self.h5_file = h5_file
+        self._fs_open = None
         if hsds:
             import h5pyd
             self._h5 = h5pyd.File(self.h5_file, 'r')
         else:
-            self._h5 = h5py.File(self.h5_file, 'r')
+            if rdcc_nbytes is None:
+                rdcc_nbytes = self.RDCC_NBYTES
+
+            if rdcc_nslots is None:
+                rdcc_nslots = self.RDCC_NSLOTS
+
+            h5_file = self.h5_file
+            if isinstance(h5_file, str) and '://' in h5_file:
+                import fsspec
+                # the OpenFile has to be kept, and closed, for as long as
+                # the file object it opens is in use
+                self._fs_open = fsspec.open(
+                    h5_file, mode='rb', block_size=self.FSSPEC_BLOCK_SIZE,
+                    cache_type='mmap')
+                h5_file = self._fs_open.open()
+
+            self._h5 = h5py.File(h5_file, 'r', rdcc_nbytes=rdcc_nbytes,
+                                 rdcc_nslots=rdcc_nslots)
 
         self._group = group
         self._unscale = unscale
@@ -448,7 +556,13 @@ class Resource:
             raise
 
     def __len__(self):
-        return self.h5['meta'].shape[0]
+        if 'meta' not in self.h5 and self.META_COLUMNS in self.h5:
+            columns = self.h5[self.META_COLUMNS]
+            n_sites = columns[list(columns)[0]].shape[0]
+        else:
+            n_sites = self.h5['meta'].shape[0]
+
+        return n_sites
 
     def __getitem__(self, keys):
         ds, ds_slice = parse_keys(keys)
@@ -505,7 +619,9 @@ class Resource:
         dsets = []
         for name in h5_obj:
             sub_obj = h5_obj[name]
-            if isinstance(sub_obj, h5py.Group):
+            if name == Resource.META_COLUMNS and group is None:
+                dsets.append('meta')
+            elif isinstance(sub_obj, h5py.Group):
                 dsets.extend(Resource._get_datasets(sub_obj, group=name))
             else:
                 dset_name = name
@@ -584,7 +700,7 @@ class Resource:
         shape : tuple
             Shape of resource variable arrays (timesteps, sites)
         """
-        _shape = (self.h5['time_index'].shape[0], self.h5['meta'].shape[0])
+        _shape = (self.h5['time_index'].shape[0], len(self))
         return _shape
 
     @property
@@ -598,7 +714,7 @@ class Resource:
             Resource Meta Data
         """
         if self._meta is None:
-            if 'meta' in self.h5:
+            if 'meta' in self.h5 or self.META_COLUMNS in self.h5:
                 self._meta = self._get_meta('meta', slice(None))
             else:
                 raise ResourceKeyError("'meta' is not a valid dataset")
@@ -704,6 +820,11 @@ class Resource:
             raise ResourceKeyError('{} not in {}'
                                    .format(ds_name, self.datasets))
 
+        if self._is_columnar_meta(ds_name):
+            raise ResourceKeyError("'meta' is stored as a group of column "
+                                   "datasets in {} and can't be opened as a "
+                                   "single dataset".format(self.META_COLUMNS))
+
         ds = ResourceDataset(self.h5[ds_name], scale_attr=self.SCALE_ATTR,
                              add_attr=self.ADD_ATTR, unscale=self._unscale)
 
@@ -725,6 +846,9 @@ class Resource:
         """
         if dset is None:
             attrs = dict(self.h5.attrs)
+        elif self._is_columnar_meta(dset):
+            attrs = dict(self.h5[self.META_COLUMNS].attrs)
+            attrs.pop('columns', None)
         else:
             attrs = dict(self.h5[dset].attrs)
 
@@ -748,8 +872,16 @@ class Resource:
         chunks : tuple
             Dataset chunk size
         """
-        ds = self.h5[dset]
-        shape, dtype, chunks = ds.shape, ds.dtype, ds.chunks
+        if self._is_columnar_meta(dset):
+            group = self.h5[self.META_COLUMNS]
+            columns = self._get_meta_columns()
+            dtype = np.dtype([(c, group[c].dtype) for c in columns])
+            ds = group[columns[0]]
+            shape, chunks = ds.shape, ds.chunks
+        else:
+            ds = self.h5[dset]
+            shape, dtype, chunks = ds.shape, ds.dtype, ds.chunks
+
         if isinstance(chunks, dict):
             chunks = tuple(chunks.get('dims', None))
 
@@ -802,8 +934,12 @@ class Resource:
         meta_arr : np.ndarray
             Extracted array from the meta data record name.
         """
-        if 'meta' in self.h5:
-            meta_arr = self.h5['meta'][rec_name, rows]
+        if 'meta' in self.h5 or self.META_COLUMNS in self.h5:
+            if 'meta' in self.h5:
+                meta_arr = self.h5['meta'][rec_name, rows]
+            else:
+                meta_arr = self.h5[self.META_COLUMNS][rec_name][rows]
+
             if self._str_decode and np.issubdtype(meta_arr.dtype, np.bytes_):
                 meta_arr = np.char.decode(meta_arr, encoding='utf-8')
         else:
@@ -852,27 +988,93 @@ class Resource:
         """
         ds_slice = parse_slice(ds_slice)
         sites = ds_slice[0]
-        if isinstance(sites, int):
+        if isinstance(sites, (int, np.integer)):
             sites = slice(sites, sites + 1)
 
-        meta = self.h5[ds_name]
-        meta = ResourceDataset.extract(meta, sites, unscale=False)
-
-        if isinstance(sites, slice):
-            if sites.stop:
-                sites = list(range(*sites.indices(sites.stop)))
+        columnar = self._is_columnar_meta(ds_name)
+        if ds_name == 'meta' and self._meta is not None:
+            # slice the cached meta instead of going back to disk
+            meta = self._meta.iloc[sites].copy()
+        else:
+            if columnar:
+                meta = self._get_columnar_meta(sites)
             else:
-                sites = list(range(len(meta)))
+                meta = self.h5[ds_name]
+                meta = ResourceDataset.extract(meta, sites, unscale=False)
 
-        meta = pd.DataFrame(meta, index=sites)
-        if self._str_decode:
-            meta = self.df_str_decode(meta)
+            if isinstance(sites, slice):
+                if sites.stop:
+                    sites = list(range(*sites.indices(sites.stop)))
+                else:
+                    sites = list(range(len(meta)))
+
+            meta = pd.DataFrame(meta, index=sites)
+            if self._str_decode:
+                meta = self.df_str_decode(meta)
 
         if len(ds_slice) == 2:
             meta = meta[ds_slice[1]]
 
         return meta
 
+    def _is_columnar_meta(self, ds_name):
+        """
+        Check if ds_name is meta stored as one dataset per column in the
+        META_COLUMNS group
+
+        Parameters
+        ----------
+        ds_name : str
+            Dataset name
+
+        Returns
+        -------
+        bool
+        """
+        return (ds_name == 'meta' and 'meta' not in self.h5
+                and self.META_COLUMNS in self.h5)
+
+    def _get_meta_columns(self):
+        """
+        Get the ordered meta column names of the META_COLUMNS group
+
+        Returns
+        -------
+        columns : list
+            Meta column names
+        """
+        group = self.h5[self.META_COLUMNS]
+        columns = group.attrs.get('columns', None)
+        if columns is None:
+            columns = list(group)
+        else:
+            columns = [c.decode('utf-8') if isinstance(c, bytes) else str(c)
+                       for c in columns]
+
+        return columns
+
+    def _get_columnar_meta(self, sites):
+        """
+        Extract meta stored as one dataset per column in the META_COLUMNS
+        group
+
+        Parameters
+        ----------
+        sites : list | slice
+            Sites to extract
+
+        Returns
+        -------
+        meta : numpy.rec.array
+            Records array of meta data for requested sites
+        """
+        group = self.h5[self.META_COLUMNS]
+        columns = self._get_meta_columns()
+        arrays = [ResourceDataset.extract(group[c], sites, unscale=False)
+                  for c in columns]
+
+        return np.rec.fromarrays(arrays, names=columns)
+
     def _get_coords(self, ds_name, ds_slice):
         """
         Extract coordinates (lat, lon) pairs
@@ -941,6 +1143,8 @@ class Resource:
         Close h5 instance
         """
         self._h5.close()
+        if getattr(self, '_fs_open', None) is not None:
+            self._fs_open.close()
 
     def _preload_SAM(self, sites, tech, **kwargs):
         """
@@ -979,7 +1183,9 @@ class MultiH5:
     Class to handle multiple h5 file Resources
     """
 
-    def __init__(self, h5_dir, prefix='', suffix='.h5'):
+    def __init__(self, h5_dir, prefix='', suffix='.h5',
+                 rdcc_nbytes=Resource.RDCC_NBYTES,
+                 rdcc_nslots=Resource.RDCC_NSLOTS):
         """
         Parameters
         ----------
@@ -989,11 +1195,19 @@ class MultiH5:
             Prefix for resource .h5 files
         suffix : str
             Suffix for resource .h5 files
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            by default Resource.RDCC_NBYTES (256 MB)
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, by default Resource.RDCC_NSLOTS (12007)
         """
         self.h5_dir = h5_dir
         self._dset_map = self._map_file_dsets(h5_dir, prefix=prefix,
                                               suffix=suffix)
-        self._h5_map = self._map_file_instances(set(self._dset_map.values()))
+        self._h5_map = self._map_file_instances(set(self._dset_map.values()),
+                                                rdcc_nbytes=rdcc_nbytes,
+                                                rdcc_nslots=rdcc_nslots)
 
         self._i = 0
 
@@ -1126,7 +1340,8 @@ class MultiH5:
         return dset_map
 
     @staticmethod
-    def _map_file_instances(h5_files):
+    def _map_file_instances(h5_files, rdcc_nbytes=Resource.RDCC_NBYTES,
+                            rdcc_nslots=Resource.RDCC_NSLOTS):
         """
         Open all .h5 files and map the open h5py instances to the
         associated file paths
@@ -1134,6 +1349,12 @@ class MultiH5:
         ----------
         h5_files : list
             List of .h5 files to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            by default Resource.RDCC_NBYTES (256 MB)
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, by default Resource.RDCC_NSLOTS (12007)
         Returns
         -------
         h5_map : dict
@@ -1141,7 +1362,9 @@ class MultiH5:
         """
         h5_map = {}
         for f_path in h5_files:
-            h5_map[f_path] = h5py.File(f_path, mode='r')
+            h5_map[f_path] = h5py.File(f_path, mode='r',
+                                       rdcc_nbytes=rdcc_nbytes,
+                                       rdcc_nslots=rdcc_nslots)
 
         return h5_map
 
@@ -1237,7 +1460,8 @@ class MultiFileResource(Resource):
     PREFIX = ''
     SUFFIX = '.h5'
 
-    def __init__(self, h5_path, unscale=True, str_decode=True):
+    def __init__(self, h5_path, unscale=True, str_decode=True,
+                 rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
@@ -1251,6 +1475,13 @@ class MultiFileResource(Resource):
         str_decode : bool
             Boolean flag to decode the bytestring meta data into normal
             strings. Setting this to False will speed up the meta data read.
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         self.h5_dir, prefix, suffix = MultiH5.multi_file_args(h5_path)
         if prefix is None:
@@ -1265,8 +1496,16 @@ class MultiFileResource(Resource):
         self._coords = None
         self._str_decode = str_decode
         self._group = None
+        if rdcc_nbytes is None:
+            rdcc_nbytes = self.RDCC_NBYTES
+
+        if rdcc_nslots is None:
+            rdcc_nslots = self.RDCC_NSLOTS
+
         # Map variables to their .h5 files
-        self._h5 = MultiH5(self.h5_dir, prefix=prefix, suffix=suffix)
+        self._h5 = MultiH5(self.h5_dir, prefix=prefix, suffix=suffix,
+                           rdcc_nbytes=rdcc_nbytes,
+                           rdcc_nslots=rdcc_nslots)
         self._h5_files = self._h5.h5_files
         self.h5_file = self._h5_files[0]
 
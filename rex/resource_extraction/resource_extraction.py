@@ -2,6 +2,10 @@
 """
 Resource Extraction Tools
 """
+from collections import namedtuple, OrderedDict
+import concurrent.futures as cf
+from functools import lru_cache
+import h5py
 import logging
 import numpy as np
 import os
@@ -17,8 +21,14 @@ from rex.resource import Resource, MultiFileResource
 from rex.renewable_resource import (MultiFileWTK, MultiFileNSRDB, NSRDB,
                                     SolarResource, WaveResource, WindResource)
 from rex.utilities import parse_year
+from rex.utilities.parse_keys import parse_slice
 
 TREE_DIR = TemporaryDirectory()
+_TREE_CACHE = OrderedDict()
+_TREE_CACHE_SIZE = 4
+# regular grid checks, stored under the same keys as the trees
+_GRID_CACHE = OrderedDict()
+GidTS = namedtuple('GidTS', 'time_index values gid')
 logger = logging.getLogger(__name__)
 
 
@@ -26,16 +36,21 @@ class ResourceX(Resource):
     """
     Resource data extraction tool
     """
+    # Maximum number of unrequested sites to read between two sites of a
+    # batch rather than reading them separately
+    SITE_BATCH_MAX_GAP = 16
+
     def __init__(self, res_h5, tree=None, unscale=True, hsds=False,
-                 str_decode=True, group=None):
+                 str_decode=True, group=None, rdcc_nbytes=None,
+                 rdcc_nslots=None):
         """
         Parameters
         ----------
         res_h5 : str
             Path to resource .h5 file of interest
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         hsds : bool
@@ -46,11 +61,22 @@ class ResourceX(Resource):
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         super().__init__(res_h5, unscale=unscale, hsds=hsds,
-                         str_decode=str_decode, group=group)
+                         str_decode=str_decode, group=group,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._tree = tree
         self._lat_lon = None
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
     @property
     def tree(self):
@@ -65,6 +91,32 @@ class ResourceX(Resource):
 
         return self._tree
 
+    @property
+    def grid(self):
+        """
+        Returns
+        -------
+        grid : tuple | NoneType
+            (lats, lons, gid_map) of a regular lat, lon grid, None if the
+            resource coordinates are not on a regular grid
+        """
+        if self._grid is None:
+            # cache the grid check under the tree cache key so that
+            # re-opened files don't re-read the coordinates
+            cache_key = self._get_tree_cache_key()
+            grid = _GRID_CACHE.get(cache_key)
+            if grid is None:
+                grid = self._get_grid(self.lat_lon) or ()
+                _GRID_CACHE[cache_key] = grid
+
+            _GRID_CACHE.move_to_end(cache_key)
+            while len(_GRID_CACHE) > _TREE_CACHE_SIZE:
+                _GRID_CACHE.popitem(last=False)
+
+            self._grid = grid
+
+        return self._grid or None
+
     @property
     def countries(self):
         """
@@ -123,15 +175,36 @@ class ResourceX(Resource):
             if 'coordinates' in self:
                 self._lat_lon = self.coordinates
             else:
-                self._lat_lon = self.meta
-                lat_lon_cols = ['latitude', 'longitude']
-                for c in self.meta.columns:
-                    if c.lower().startswith('lat'):
-                        lat_lon_cols[0] = c
-                    elif c.lower().startswith('lon'):
-                        lat_lon_cols[1] = c
-
-                self._lat_lon = self._lat_lon[lat_lon_cols].values
+                # read just the lat, lon fields from disk unless the meta
+                # has already been loaded
+                columns = None
+                if self._meta is None and isinstance(self.h5, h5py.Group):
+                    if 'meta' in self.h5:
+                        columns = self.h5['meta'].dtype.names
+                    elif self.META_COLUMNS in self.h5:
+                        columns = list(self.h5[self.META_COLUMNS])
+
+                fields = columns is not None
+                if not fields:
+                    columns = self.meta.columns
+
+                cols = {c.lower(): c for c in columns}
+                lat_col = next((c for k, c in cols.items()
+                                if k.startswith('lat')), 'latitude')
+                lon_col = next((c for k, c in cols.items()
+                                if k.startswith('lon')), 'longitude')
+
+                if fields and 'meta' in self.h5:
+                    meta = self.h5['meta'][lat_col, lon_col]
+                    lat_lon = np.column_stack((meta[lat_col], meta[lon_col]))
+                elif fields:
+                    lat_lon = np.column_stack((self.get_meta_arr(lat_col),
+                                               self.get_meta_arr(lon_col)))
+                else:
+                    lat_lon = self.meta[[lat_col, lon_col]]
+                    lat_lon = lat_lon.to_numpy(copy=False)
+
+                self._lat_lon = np.ascontiguousarray(lat_lon)
 
         return self._lat_lon
 
@@ -149,26 +222,29 @@ class ResourceX(Resource):
         Returns
         -------
         tree_file : str
-            Path to pre-comupted tree .pkl file name
+            Path to pre-comupted tree .npy file name
         """
         f_name = os.path.basename(h5_file)
         try:
             year = parse_year(f_name)
-            tree_file = f_name.split(str(year))[0] + 'tree.pkl'
+            tree_file = f_name.split(str(year))[0] + 'latlon.npy'
         except RuntimeError:
-            tree_file = f_name.replace('.h5', '_tree.pkl')
+            tree_file = f_name.replace('.h5', '_latlon.npy')
 
         return tree_file
 
     @staticmethod
-    def _load_tree(tree_pickle):
+    def _load_tree(tree_path):
         """
-        Load tree from pickle file
+        Load tree from .npy or .npz file of lat, lon coordinates or legacy
+        pickle file
 
         Parameters
         ----------
-        tree_pickle : str
-            Pickle (.pkl, .pickle) file containing precomputed cKDTree
+        tree_path : str
+            .npy file containing the (lat, lon) coordinates to build the
+            cKDTree from, .npz file written by save_tree, or pickle (.pkl,
+            .pickle) file containing precomputed cKDTree
 
         Returns
         -------
@@ -176,59 +252,112 @@ class ResourceX(Resource):
             Precomputed tree of lat, lon coordinates
         """
         try:
-            with open(tree_pickle, 'rb') as f:
-                tree = pickle.load(f)
+            if tree_path.endswith('.npy'):
+                lat_lon = np.load(tree_path, mmap_mode='r')
+                tree = ResourceX._build_tree(lat_lon)
+            elif tree_path.endswith('.npz'):
+                with np.load(tree_path) as f:
+                    tree = ResourceX._build_tree(
+                        f['coords'], leafsize=f['leafsize'].item())
+            else:
+                with open(tree_path, 'rb') as f:
+                    tree = pickle.load(f)
         except Exception as e:
             logger.warning('Could not extract tree from {}: {}'
-                           .format(tree_pickle, e))
+                           .format(tree_path, e))
             tree = None
 
         return tree
 
     @staticmethod
-    def _load_tree(tree_path):
+    @lru_cache(maxsize=8)
+    def _load_cached_tree(tree_path, mtime):
         """
-        Load tree from pickle file
+        Load tree from file, memoized on the file path and modification time
+        so that instances sharing a pre-computed tree file share the tree
 
         Parameters
         ----------
         tree_path : str
-            Pickle (.pkl, .pickle) file containing precomputed cKDTree
+            Absolute path to .npy, .npz or pickle file containing the tree
+        mtime : float
+            Modification time of tree_path, used to invalidate the cache if
+            the file changes
 
         Returns
         -------
         tree : cKDTree
             Precomputed tree of lat, lon coordinates
         """
-        try:
-            with open(tree_path, 'rb') as f:
-                tree = pickle.load(f)
-        except Exception as e:
-            logger.warning('Could not extract tree from {}: {}'
-                           .format(tree_path, e))
-            tree = None
+        return ResourceX._load_tree(tree_path)
+
+    @staticmethod
+    def _build_tree(lat_lon, leafsize=32):
+        """
+        Build cKDTree of lat, lon coordinates. The tree is not balanced or
+        compacted as this greatly reduces the build time without impacting
+        the nearest neighbor look-up results.
+
+        Parameters
+        ----------
+        lat_lon : ndarray
+            (n, 2) array of (lat, lon) coordinates
+        leafsize : int, optional
+            Number of points at which the tree switches to brute-force,
+            by default 32
+
+        Returns
+        -------
+        tree : cKDTree
+            cKDTree of lat, lon coordinates
+        """
+        lat_lon = np.asarray(lat_lon, dtype=np.float32)
+        # pylint: disable=not-callable
+        tree = cKDTree(lat_lon, leafsize=leafsize, balanced_tree=False,
+                       compact_nodes=False)
 
         return tree
 
     @staticmethod
     def _save_tree(tree, tree_path):
         """
-        Save pre-computed Tree to TEMP_DIR as a pickle file
+        Save the lat, lon coordinates of pre-computed Tree to TEMP_DIR as a
+        float32 .npy file, the tree is rebuilt from the coordinates on load
+        which is faster and more compact than pickling the cKDTree
 
         Parameters
         ----------
         tree : cKDTree
             pre-computed cKDTree
         tree_path : str
-            Path to pickle file in TEMP_DIR to save tree too
+            Path to .npy file in TEMP_DIR to save tree coordinates too
         """
         try:
-            with open(tree_path, 'wb') as f:
-                pickle.dump(tree, f)
+            np.save(tree_path, tree.data.astype(np.float32))
         except Exception as e:
             logger.warning('Could not save tree to {}: {}'
                            .format(tree_path, e))
 
+    @staticmethod
+    def save_tree(tree, tree_path):
+        """
+        Save pre-computed tree to a .npz file containing the tree's float32
+        lat, lon coordinates and leafsize. The file can be passed as the tree
+        argument and is much faster to load than a pickled cKDTree.
+
+        Parameters
+        ----------
+        tree : cKDTree
+            pre-computed cKDTree
+        tree_path : str
+            Path to .npz file to save tree to
+        """
+        if not tree_path.endswith('.npz'):
+            tree_path += '.npz'
+
+        np.savez(tree_path, coords=tree.data.astype(np.float32),
+                 leafsize=tree.leafsize)
+
     @staticmethod
     def _to_SAM_csv(sam_df, site_meta, out_path):
         """
@@ -250,8 +379,6 @@ class ResourceX(Resource):
 
             out_path = os.path.join(out_path, "{}.csv".format(sam_df.name))
 
-        sam_df.to_csv(out_path, index=False)
-
         if 'gid' not in site_meta:
             site_meta.index.name = 'gid'
             site_meta = site_meta.reset_index()
@@ -269,10 +396,103 @@ class ResourceX(Resource):
         cols = ','.join(site_meta.columns)
         values = ','.join(site_meta.values[0].astype(str))
 
-        with open(out_path, 'r+') as f:
-            content = f.read()
-            f.seek(0, 0)
-            f.write(cols + '\n' + values + '\n' + content)
+        with open(out_path, 'w') as f:
+            f.write(cols + '\n' + values + '\n')
+
+        sam_df.to_csv(out_path, index=False, mode='a')
+
+    @staticmethod
+    def _get_cached_tree(cache_key):
+        """
+        Get tree from the in memory tree cache
+
+        Parameters
+        ----------
+        cache_key : str
+            Path to source .h5 file directory joined with the tree file name
+
+        Returns
+        -------
+        tree : cKDTree | NoneType
+            Cached cKDTree of lat, lon coordinates, None if cache_key is not
+            in the cache
+        """
+        tree = _TREE_CACHE.get(cache_key)
+        if tree is not None:
+            _TREE_CACHE.move_to_end(cache_key)
+
+        return tree
+
+    @staticmethod
+    def _cache_tree(cache_key, tree):
+        """
+        Add tree to the in memory tree cache, evicting the least recently
+        used tree if the cache is full
+
+        Parameters
+        ----------
+        cache_key : str
+            Path to source .h5 file directory joined with the tree file name
+        tree : cKDTree
+            cKDTree of lat, lon coordinates
+        """
+        _TREE_CACHE[cache_key] = tree
+        _TREE_CACHE.move_to_end(cache_key)
+        while len(_TREE_CACHE) > _TREE_CACHE_SIZE:
+            _TREE_CACHE.popitem(last=False)
+
+    def _get_tree_cache_key(self):
+        """
+        Get the in memory tree cache key for this resource, the key is based
+        on the year-less tree file so that all years of a dataset share a
+        single tree
+
+        Returns
+        -------
+        cache_key : str
+            Path to source .h5 file directory joined with the tree file name
+        """
+        tree_path = self._get_tree_file(self.h5_file)
+
+        return os.path.join(os.path.dirname(self.h5_file), tree_path)
+
+    def _save_SAM_csvs(self, gids, SAM_df, out_path, max_workers=None):
+        """
+        Save SAM DataFrames to disk as SAM compliant .csv files, the files
+        are written in parallel using a thread pool
+
+        Parameters
+        ----------
+        gids : list
+            Resource gids the SAM DataFrames were extracted for
+        SAM_df : list
+            List of rex SAM DataFrames, one per gid
+        out_path : str
+            Path to .csv file or directory to save data too
+        max_workers : int, optional
+            Number of threads to use to write the .csv files, None will use
+            up to 16 threads, by default None
+        """
+        meta = self['meta', np.asarray(gids)]
+        site_metas = [meta.iloc[[i]] for i in range(len(gids))]
+        if max_workers is None:
+            max_workers = min(16, os.cpu_count())
+
+        # all sites written to a single .csv file have to be written
+        # serially so that the last site's header and data are not
+        # interleaved with another site's
+        serial = (len(gids) == 1 or max_workers == 1
+                  or out_path.endswith('.csv'))
+        if serial:
+            for df, site_meta in zip(SAM_df, site_metas):
+                self._to_SAM_csv(df, site_meta, out_path)
+        else:
+            with cf.ThreadPoolExecutor(max_workers=max_workers) as exe:
+                futures = [exe.submit(self._to_SAM_csv, df, site_meta,
+                                      out_path)
+                           for df, site_meta in zip(SAM_df, site_metas)]
+                for future in futures:
+                    future.result()
 
     def _init_tree(self, tree):
         """
@@ -281,9 +501,9 @@ class ResourceX(Resource):
         Parameters
         ----------
         tree : str | cKDTree | NoneType
-            Path to .pgz file containing pre-computed tree
-            If None search bin for .pgz file matching h5 file
-            else compute tree
+            Path to .npy, .npz or .pkl file containing pre-computed tree
+            If None search the in memory cache and then TREE_DIR for a
+            tree matching h5 file else compute tree
 
         Returns
         -------
@@ -293,25 +513,253 @@ class ResourceX(Resource):
         tree_path = self._get_tree_file(self.h5_file)
         if not isinstance(tree, (cKDTree, str, type(None))):
             tree = None
-            logger.warning('Precomputed tree must be supplied as a pickle '
-                           'file or a cKDTree, not a {}'
+            logger.warning('Precomputed tree must be supplied as a .npy, '
+                           '.npz or pickle file or a cKDTree, not a {}'
                            .format(type(tree)))
 
-        if tree is None:
-            if tree_path in os.listdir(TREE_DIR.name):
+        cache_key = self._get_tree_cache_key()
+        cache = tree is None
+        if cache:
+            tree = self._get_cached_tree(cache_key)
+            if tree is None and tree_path in os.listdir(TREE_DIR.name):
                 tree = os.path.join(TREE_DIR.name, tree_path)
 
-        if isinstance(tree, str):
+        if isinstance(tree, str) and os.path.isfile(tree):
+            tree = self._load_cached_tree(os.path.abspath(tree),
+                                          os.path.getmtime(tree))
+        elif isinstance(tree, str):
             tree = self._load_tree(tree)
 
         if tree is None:
-            lat_lon = self.lat_lon
-            tree = cKDTree(lat_lon)  # pylint: disable=not-callable
+            tree = self._build_tree(self.lat_lon)
             self._save_tree(tree, os.path.join(TREE_DIR.name, tree_path))
 
+        if cache:
+            self._cache_tree(cache_key, tree)
+
         return tree
 
-    def lat_lon_gid(self, lat_lon):
+    def _get_ds(self, ds_name, ds_slice):
+        """
+        Extract data from given dataset. If a batch of sites is being
+        extracted, the full timeseries of all sites in the batch are read
+        in a single call the first time ds_name is requested and the
+        requested site is returned from memory.
+
+        Parameters
+        ----------
+        ds_name : str
+            Variable dataset to be extracted
+        ds_slice : int | list | slice
+            tuple describing slice of dataset array to extract
+
+        Returns
+        -------
+        out : ndarray
+            ndarray of variable timeseries data
+            If unscale, returned in native units else in scaled units
+        """
+        site = None
+        ds_slice = parse_slice(ds_slice)
+        batch = (self._site_batch is not None and len(ds_slice) == 2
+                 and isinstance(ds_slice[0], slice)
+                 and ds_slice[0] == slice(None))
+        if batch:
+            site = ds_slice[1]
+            gids, batch_data = self._site_batch
+            if not isinstance(site, (int, np.integer)) or site not in gids:
+                site = None
+
+        if site is not None:
+            if ds_name not in batch_data:
+                # read nearby gids together, distant gids separately, so
+                # that a few distant gids don't read the full dataset
+                data = []
+                for group in self._group_gids(gids):
+                    group_slice = slice(group[0], group[-1] + 1)
+                    group_data = super()._get_ds(ds_name,
+                                                 (slice(None), group_slice))
+                    data.append(group_data[:, group - group[0]])
+
+                batch_data[ds_name] = np.hstack(data)
+
+            idx = np.searchsorted(gids, site)
+            out = batch_data[ds_name][:, idx].copy()
+        else:
+            out = super()._get_ds(ds_name, ds_slice)
+
+        return out
+
+    def _get_SAM_df_batch(self, ds_name, gids, **kwargs):
+        """
+        Extract SAM DataFrames for a batch of sites, reading each variable
+        for all sites with a single .h5 read rather than once per site
+
+        Parameters
+        ----------
+        ds_name : str
+            'Dataset' name == SAM
+        gids : list
+            Resource gids to extract SAM DataFrames for
+        kwargs : dict
+            Internal kwargs for _get_SAM_df
+
+        Returns
+        -------
+        SAM_df : list
+            List of SAM DataFrames in the same order as gids
+        """
+        self._site_batch = (np.unique(gids), {})
+        try:
+            # pylint: disable=E1111
+            SAM_df = [self._get_SAM_df(ds_name, gid, **kwargs)
+                      for gid in gids]
+        finally:
+            self._site_batch = None
+
+        return SAM_df
+
+    @classmethod
+    def _group_gids(cls, gids):
+        """
+        Split sorted gids into groups of nearby gids that can each be read
+        with a single contiguous read without reading more than
+        SITE_BATCH_MAX_GAP unrequested sites between any two requested sites
+
+        Parameters
+        ----------
+        gids : ndarray
+            Sorted unique gids
+
+        Returns
+        -------
+        groups : list
+            List of gid arrays, one per contiguous read
+        """
+        breaks = np.where(np.diff(gids) > cls.SITE_BATCH_MAX_GAP + 1)[0] + 1
+
+        return np.split(gids, breaks)
+
+    @staticmethod
+    def _get_grid(lat_lon):
+        """
+        Check if (lat, lon) coordinates make up a full regular grid and if so
+        map each grid cell to its gid
+
+        Parameters
+        ----------
+        lat_lon : ndarray
+            (n, 2) array of (lat, lon) coordinates
+
+        Returns
+        -------
+        grid : tuple | NoneType
+            (lats, lons, gid_map) where lats and lons are the sorted unique
+            grid coordinates and gid_map is a (len(lats), len(lons)) array of
+            gids, None if the coordinates are not a full regular grid
+        """
+        lats, lat_idx = np.unique(lat_lon[:, 0], return_inverse=True)
+        lons, lon_idx = np.unique(lat_lon[:, 1], return_inverse=True)
+        cells = lat_idx * len(lons) + lon_idx
+
+        grid = None
+        n_sites = len(lat_lon)
+        if (len(lats) * len(lons) == n_sites
+                and len(np.unique(cells)) == n_sites):
+            gid_map = np.empty(n_sites, dtype=np.int64)
+            gid_map[cells] = np.arange(n_sites)
+            grid = (lats, lons, gid_map.reshape(len(lats), len(lons)))
+
+        return grid
+
+    @staticmethod
+    def _grid_query(grid, lat_lon):
+        """
+        Find the nearest gid on a regular grid to each (lat, lon) pair using
+        a binary search of the sorted grid latitudes and longitudes
+
+        Parameters
+        ----------
+        grid : tuple
+            (lats, lons, gid_map) as returned by _get_grid
+        lat_lon : ndarray
+            Either a single (lat, lon) pair or series of (lat, lon) pairs
+
+        Returns
+        -------
+        gids : int | ndarray
+            Nearest gid(s) to given (lat, lon) pair(s)
+        """
+        lats, lons, gid_map = grid
+        lat_lon = np.asarray(lat_lon)
+        pairs = lat_lon.reshape(-1, 2)
+
+        idx = []
+        for values, coords in zip((lats, lons), pairs.T):
+            i = np.clip(np.searchsorted(values, coords), 1, len(values) - 1)
+            if len(values) > 1:
+                left = coords - values[i - 1] <= values[i] - coords
+                i = np.where(left, i - 1, i)
+            else:
+                i = np.zeros(len(coords), dtype=np.int64)
+
+            idx.append(i)
+
+        gids = gid_map[idx[0], idx[1]]
+        if lat_lon.ndim == 1:
+            gids = gids[0]
+
+        return gids
+
+    @staticmethod
+    def _haversine_refine(tree, lat_lon, k=4, workers=-1):
+        """
+        Find the nearest site to each (lat, lon) pair by great-circle
+        distance, using the k nearest euclidean neighbors from the tree as
+        candidates
+
+        Parameters
+        ----------
+        tree : cKDTree
+            cKDTree built on the resource (lat, lon) coordinates
+        lat_lon : ndarray
+            Either a single (lat, lon) pair or series of (lat, lon) pairs
+        k : int, optional
+            Number of candidate sites to check for each pair, by default 4
+        workers : int, optional
+            Number of workers to use to query the tree, -1 uses all
+            available cores, by default -1
+
+        Returns
+        -------
+        gids : int | ndarray
+            Nearest gid(s) to given (lat, lon) pair(s)
+        """
+        lat_lon = np.asarray(lat_lon, dtype=np.float64)
+        k = min(k, tree.n)
+        _, candidates = tree.query(lat_lon.reshape(-1, 2), k=k,
+                                   workers=workers)
+        candidates = candidates.reshape(-1, k)
+
+        lat1, lon1 = np.radians(lat_lon.reshape(-1, 2)).T[:, :, None]
+        site_coords = np.radians(tree.data[candidates].astype(np.float64))
+        lat2 = site_coords[..., 0]
+        lon2 = site_coords[..., 1]
+
+        # haversine, the monotonic arcsin/sqrt terms are not needed to
+        # rank the candidates
+        dist = (np.sin((lat2 - lat1) / 2)**2
+                + np.cos(lat1) * np.cos(lat2)
+                * np.sin((lon2 - lon1) / 2)**2)
+
+        idx = np.argmin(dist, axis=1)
+        gids = candidates[np.arange(len(candidates)), idx]
+        if lat_lon.ndim == 1:
+            gids = gids[0]
+
+        return gids
+
+    def lat_lon_gid(self, lat_lon, workers=-1, metric='euclidean'):
         """
         Get nearest gid to given (lat, lon) pair or pairs
 
@@ -319,13 +767,53 @@ class ResourceX(Resource):
         ----------
         lat_lon : ndarray
             Either a single (lat, lon) pair or series of (lat, lon) pairs
+        workers : int, optional
+            Number of workers to use to query the tree, -1 uses all
+            available cores, by default -1
+        metric : str, optional
+            Distance metric to use, 'euclidean' finds the nearest site in
+            (lat, lon) space, 'haversine' finds the nearest site by
+            great-circle distance, by default 'euclidean'
 
         Returns
         -------
         gids : int | ndarray
             Nearest gid(s) to given (lat, lon) pair(s)
         """
-        _, gids = self.tree.query(lat_lon)
+        if metric == 'haversine':
+            gids = self._haversine_refine(self.tree, lat_lon, workers=workers)
+        elif metric == 'euclidean' and self.grid is not None:
+            gids = self._grid_query(self.grid, lat_lon)
+        elif metric == 'euclidean':
+            _, gids = self.tree.query(lat_lon, k=1, workers=workers)
+        else:
+            msg = ("metric must be 'euclidean' or 'haversine', not {}"
+                   .format(metric))
+            logger.error(msg)
+            raise ValueError(msg)
+
+        return gids
+
+    def nearest_site(self, lat_lon, k=1):
+        """
+        Get the k nearest gids to each (lat, lon) pair with a single batched
+        tree query
+
+        Parameters
+        ----------
+        lat_lon : ndarray
+            Either a single (lat, lon) pair or series of (lat, lon) pairs
+        k : int, optional
+            Number of nearest gids to find for each pair, by default 1
+
+        Returns
+        -------
+        gids : ndarray
+            (n,) array of the nearest gid to each of the n pairs if k == 1,
+            else (n, k) array of the k nearest gids sorted by distance
+        """
+        lat_lon = np.asarray(lat_lon, dtype=np.float64).reshape(-1, 2)
+        _, gids = self.tree.query(lat_lon, k=k, workers=-1)
 
         return gids
 
@@ -343,10 +831,16 @@ class ResourceX(Resource):
         Returns
         -------
         gids : ndarray
-            Vector of gids in given region
+            Sorted vector of gids in given region
         """
-        gids = self.meta
-        gids = gids[gids[region_col] == region].index.values
+        if region_col not in self._region_groups:
+            groups = self.meta.groupby(region_col).groups
+            self._region_groups[region_col] = {
+                k: np.sort(v.to_numpy()) for k, v in groups.items()}
+
+        gids = self._region_groups[region_col].get(region)
+        if gids is None:
+            gids = np.array([], dtype=self.meta.index.dtype)
 
         return gids
 
@@ -365,7 +859,7 @@ class ResourceX(Resource):
             Time index value
         """
         timestep = pd.to_datetime(timestep)
-        idx = np.where(self.time_index == timestep)[0][0]
+        idx = self.time_index.get_loc(timestep)
 
         return idx
 
@@ -378,7 +872,9 @@ class ResourceX(Resource):
         ds_name : str
             Dataset to extract
         gid : int | list
-            Resource gid(s) of interset
+            Resource gid(s) of interset, gids are read from disk as a single
+            monotonically increasing selection but are returned in the
+            order given
 
         Return
         ------
@@ -389,7 +885,7 @@ class ResourceX(Resource):
 
         return site_ts
 
-    def get_gid_df(self, ds_name, gid):
+    def get_gid_df(self, ds_name, gid, as_frame=True):
         """
         Extract timeseries of site(s) nearest to given lat_lon(s) and return
         as a DataFrame
@@ -399,27 +895,35 @@ class ResourceX(Resource):
         ds_name : str
             Dataset to extract
         gid : int | list
-            Resource gid(s) of interset
+            Resource gid(s) of interset, gids are read from disk as a single
+            monotonically increasing selection but are returned in the
+            order given
+        as_frame : bool, optional
+            Flag to return a DataFrame, if False return a light-weight GidTS
+            namedtuple of (time_index, values, gid) instead,
+            by default True
 
         Return
         ------
-        site_df : pandas.DataFrame
+        site_df : pandas.DataFrame | GidTS
             Time-series DataFrame for given site and dataset
         """
-        if isinstance(gid, int):
+        if not as_frame:
+            site_df = GidTS(self.time_index, self[ds_name, :, gid], gid)
+        elif isinstance(gid, int):
             site_df = pd.DataFrame({ds_name: self[ds_name, :, gid]},
                                    index=self.time_index)
             site_df.name = gid
             site_df.index.name = 'time_index'
         else:
             site_df = pd.DataFrame(self[ds_name, :, gid], columns=gid,
-                                   index=self.time_index)
+                                   index=self.time_index, copy=False)
             site_df.name = ds_name
             site_df.index.name = 'time_index'
 
         return site_df
 
-    def get_lat_lon_ts(self, ds_name, lat_lon):
+    def get_lat_lon_ts(self, ds_name, lat_lon, workers=-1):
         """
         Extract timeseries of site(s) neareset to given lat_lon(s)
 
@@ -429,18 +933,21 @@ class ResourceX(Resource):
             Dataset to extract
         lat_lon : tuple | list
             (lat, lon) coordinate of interest or pairs of coordinates
+        workers : int, optional
+            Number of workers to use to query the tree, -1 uses all
+            available cores, by default -1
 
         Return
         ------
         site_ts : ndarray
             Time-series for given site(s) and dataset
         """
-        gid = self.lat_lon_gid(lat_lon)
+        gid = self.lat_lon_gid(lat_lon, workers=workers)
         site_ts = self.get_gid_ts(ds_name, gid)
 
         return site_ts
 
-    def get_lat_lon_df(self, ds_name, lat_lon):
+    def get_lat_lon_df(self, ds_name, lat_lon, workers=-1, as_frame=True):
         """
         Extract timeseries of site(s) nearest to given lat_lon(s) and return
         as a DataFrame
@@ -451,14 +958,21 @@ class ResourceX(Resource):
             Dataset to extract
         lat_lon : tuple
             (lat, lon) coordinate of interest
+        workers : int, optional
+            Number of workers to use to query the tree, -1 uses all
+            available cores, by default -1
+        as_frame : bool, optional
+            Flag to return a DataFrame, if False return a light-weight GidTS
+            namedtuple of (time_index, values, gid) instead,
+            by default True
 
         Return
         ------
-        site_df : pandas.DataFrame
+        site_df : pandas.DataFrame | GidTS
             Time-series DataFrame for given site and dataset
         """
-        gid = self.lat_lon_gid(lat_lon)
-        site_df = self.get_gid_df(ds_name, gid)
+        gid = self.lat_lon_gid(lat_lon, workers=workers)
+        site_df = self.get_gid_df(ds_name, gid, as_frame=as_frame)
 
         return site_df
 
@@ -486,7 +1000,8 @@ class ResourceX(Resource):
 
         return region_ts
 
-    def get_region_df(self, ds_name, region, region_col='state'):
+    def get_region_df(self, ds_name, region, region_col='state',
+                      as_frame=True):
         """
         Extract timeseries of of all sites in given region and return as a
         DataFrame
@@ -499,22 +1014,75 @@ class ResourceX(Resource):
             Region to extract all pixels for
         region_col : str
             Region column to search
+        as_frame : bool, optional
+            Flag to return a DataFrame, if False return a light-weight GidTS
+            namedtuple of (time_index, values, gid) instead,
+            by default True
 
         Return
         ------
-        region_df : pandas.DataFrame
+        region_df : pandas.DataFrame | GidTS
             Time-series array of desired dataset for all sites in desired
             region
         """
         gids = self.region_gids(region, region_col=region_col)
-        region_df = pd.DataFrame(self[ds_name, :, gids], columns=gids,
-                                 index=self.time_index)
-        region_df.name = ds_name
-        region_df.index.name = 'time_index'
+        if as_frame:
+            # wrap the extracted array without copying it into a new block
+            region_df = pd.DataFrame(self[ds_name, :, gids], columns=gids,
+                                     index=self.time_index, copy=False)
+            region_df.name = ds_name
+            region_df.index.name = 'time_index'
+        else:
+            region_df = GidTS(self.time_index, self[ds_name, :, gids], gids)
 
         return region_df
 
-    def get_SAM_gid(self, gid, out_path=None, **kwargs):
+    def get_region_df_chunked(self, ds_name, region, region_col='state',
+                              chunk_rows=8760):
+        """
+        Iterate over timeseries of all sites in given region in blocks of
+        timesteps, yielding a DataFrame for each block so that the full
+        region timeseries is never held in memory
+
+        Parameters
+        ----------
+        ds_name : str
+            Dataset to extract
+        region : str
+            Region to extract all pixels for
+        region_col : str
+            Region column to search
+        chunk_rows : int, optional
+            Number of timesteps to extract per block, rounded up to a
+            multiple of the dataset's time chunk size so that each chunk is
+            only read once, by default 8760
+
+        Yields
+        ------
+        region_df : pandas.DataFrame
+            Time-series array of desired dataset for all sites in desired
+            region for a block of timesteps
+        """
+        gids = self.region_gids(region, region_col=region_col)
+        if ds_name in self:
+            chunks = self.get_dset_properties(ds_name)[-1]
+            if chunks is not None:
+                t_chunk = chunks[0]
+                chunk_rows = int(np.ceil(chunk_rows / t_chunk) * t_chunk)
+
+        time_index = self.time_index
+        for start in range(0, len(time_index), chunk_rows):
+            stop = min(start + chunk_rows, len(time_index))
+            region_df = pd.DataFrame(self[ds_name, start:stop, gids],
+                                     columns=gids,
+                                     index=time_index[start:stop],
+                                     copy=False)
+            region_df.name = ds_name
+            region_df.index.name = 'time_index'
+
+            yield region_df
+
+    def get_SAM_gid(self, gid, out_path=None, max_workers=None, **kwargs):
         """
         Extract time-series of all variables needed to run SAM for nearest
         site to given resource gid
@@ -525,6 +1093,9 @@ class ResourceX(Resource):
             Resource gid(s) of interset
         out_path : str, optional
             Path to save SAM data to in SAM .csv format, by default None
+        max_workers : int, optional
+            Number of threads to use to write SAM .csv files, None will use
+            up to 16 threads, by default None
         kwargs : dict
             Internal kwargs for _get_SAM_df
 
@@ -535,24 +1106,26 @@ class ResourceX(Resource):
             If multiple lat, lon pairs are given a list of DatFrames is
             returned
         """
-        if isinstance(gid, int):
+        if isinstance(gid, (int, np.integer)):
             gid = [gid, ]
 
-        SAM_df = []
-        for res_id in gid:
+        if len(gid) > 1:
+            SAM_df = self._get_SAM_df_batch('SAM', gid, **kwargs)
+        else:
             # pylint: disable=E1111
-            df = self._get_SAM_df('SAM', res_id, **kwargs)
-            SAM_df.append(df)
-            if out_path is not None:
-                site_meta = self['meta', res_id]
-                self._to_SAM_csv(df, site_meta, out_path)
+            SAM_df = [self._get_SAM_df('SAM', gid[0], **kwargs)]
+
+        if out_path is not None:
+            self._save_SAM_csvs(gid, SAM_df, out_path,
+                                max_workers=max_workers)
 
         if len(SAM_df) == 1:
             SAM_df = SAM_df[0]
 
         return SAM_df
 
-    def get_SAM_lat_lon(self, lat_lon, out_path=None, **kwargs):
+    def get_SAM_lat_lon(self, lat_lon, out_path=None, max_workers=None,
+                        **kwargs):
         """
         Extract time-series of all variables needed to run SAM for nearest
         site to given lat_lon
@@ -563,6 +1136,9 @@ class ResourceX(Resource):
             (lat, lon) coordinate of interest
         out_path : str, optional
             Path to save SAM data to in SAM .csv format, by default None
+        max_workers : int, optional
+            Number of threads to use to write SAM .csv files, None will use
+            up to 16 threads, by default None
         kwargs : dict
             Internal kwargs for _get_SAM_df
 
@@ -574,7 +1150,8 @@ class ResourceX(Resource):
             returned
         """
         gid = self.lat_lon_gid(lat_lon)
-        SAM_df = self.get_SAM_gid(gid, out_path=out_path, **kwargs)
+        SAM_df = self.get_SAM_gid(gid, out_path=out_path,
+                                  max_workers=max_workers, **kwargs)
 
         return SAM_df
 
@@ -619,8 +1196,8 @@ class MultiFileResourceX(MultiFileResource, ResourceX):
     """
     Multi-File resource extraction class
     """
-    def __init__(self, resource_path, tree=None, unscale=True,
-                 str_decode=True):
+    def __init__(self, resource_path, tree=None, unscale=True, str_decode=True,
+                 rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
@@ -630,17 +1207,28 @@ class MultiFileResourceX(MultiFileResource, ResourceX):
                 /h5_dir/
                 /h5_dir/prefix*suffix
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
             Boolean flag to decode the bytestring meta data into normal
             strings. Setting this to False will speed up the meta data read.
-        """
-        super().__init__(resource_path, unscale=unscale, str_decode=str_decode)
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
+        """
+        super().__init__(resource_path, unscale=unscale, str_decode=str_decode,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class MultiYearResourceX(MultiYearResource, ResourceX):
@@ -660,8 +1248,8 @@ class MultiYearResourceX(MultiYearResource, ResourceX):
         years : list, optional
             List of years to access, by default None
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
@@ -677,6 +1265,9 @@ class MultiYearResourceX(MultiYearResource, ResourceX):
                          str_decode=str_decode, hsds=hsds, res_cls=res_cls)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
     def get_means_map(self, ds_name, year, region=None,
                       region_col='state'):
@@ -718,15 +1309,16 @@ class SolarX(SolarResource, ResourceX):
     Solar Resource extraction class
     """
     def __init__(self, solar_h5, tree=None, unscale=True, hsds=False,
-                 str_decode=True, group=None):
+                 str_decode=True, group=None, rdcc_nbytes=None,
+                 rdcc_nslots=None):
         """
         Parameters
         ----------
         solar_h5 : str
             Path to solar .h5 file of interest
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         hsds : bool
@@ -737,11 +1329,22 @@ class SolarX(SolarResource, ResourceX):
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         super().__init__(solar_h5, unscale=unscale, hsds=hsds,
-                         str_decode=str_decode, group=group)
+                         str_decode=str_decode, group=group,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class NSRDBX(NSRDB, ResourceX):
@@ -749,15 +1352,16 @@ class NSRDBX(NSRDB, ResourceX):
     NSRDB extraction class
     """
     def __init__(self, nsrdb_h5, tree=None, unscale=True, hsds=False,
-                 str_decode=True, group=None):
+                 str_decode=True, group=None, rdcc_nbytes=None,
+                 rdcc_nslots=None):
         """
         Parameters
         ----------
         nsrdb_h5 : str
             Path to NSRDB .h5 file of interest
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         hsds : bool
@@ -768,18 +1372,30 @@ class NSRDBX(NSRDB, ResourceX):
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         super().__init__(nsrdb_h5, unscale=unscale, hsds=hsds,
-                         str_decode=str_decode, group=group)
+                         str_decode=str_decode, group=group,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class MultiFileNSRDBX(MultiFileNSRDB, ResourceX):
     """
     Multi-File NSRDB extraction class
     """
-    def __init__(self, nsrdb_path, tree=None, unscale=True, str_decode=True):
+    def __init__(self, nsrdb_path, tree=None, unscale=True, str_decode=True,
+                 rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
@@ -789,17 +1405,28 @@ class MultiFileNSRDBX(MultiFileNSRDB, ResourceX):
                 /h5_dir/
                 /h5_dir/prefix*suffix
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
             Boolean flag to decode the bytestring meta data into normal
             strings. Setting this to False will speed up the meta data read.
-        """
-        super().__init__(nsrdb_path, unscale=unscale, str_decode=str_decode)
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
+        """
+        super().__init__(nsrdb_path, unscale=unscale, str_decode=str_decode,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class MultiYearNSRDBX(MultiYearNSRDB, MultiYearResourceX):
@@ -819,8 +1446,8 @@ class MultiYearNSRDBX(MultiYearNSRDB, MultiYearResourceX):
         years : list, optional
             List of years to access, by default None
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
@@ -834,6 +1461,9 @@ class MultiYearNSRDBX(MultiYearNSRDB, MultiYearResourceX):
                          str_decode=str_decode, hsds=hsds)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class WindX(WindResource, ResourceX):
@@ -841,15 +1471,16 @@ class WindX(WindResource, ResourceX):
     Wind Resource extraction class
     """
     def __init__(self, wind_h5, tree=None, unscale=True, hsds=False,
-                 str_decode=True, group=None):
+                 str_decode=True, group=None, rdcc_nbytes=None,
+                 rdcc_nslots=None):
         """
         Parameters
         ----------
         wind_h5 : str
             Path to Wind .h5 file of interest
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         hsds : bool
@@ -860,13 +1491,25 @@ class WindX(WindResource, ResourceX):
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         super().__init__(wind_h5, unscale=unscale, hsds=hsds,
-                         str_decode=str_decode, group=group)
+                         str_decode=str_decode, group=group,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
-    def get_SAM_gid(self, hub_height, gid, out_path=None, **kwargs):
+    def get_SAM_gid(self, hub_height, gid, out_path=None, max_workers=None,
+                    **kwargs):
         """
         Extract time-series of all variables needed to run SAM for nearest
         site to given resource gid and hub height
@@ -879,6 +1522,9 @@ class WindX(WindResource, ResourceX):
             Resource gid(s) of interset
         out_path : str, optional
             Path to save SAM data to in SAM .csv format, by default None
+        max_workers : int, optional
+            Number of threads to use to write SAM .csv files, None will use
+            up to 16 threads, by default None
         kwargs : dict
             Internal kwargs for _get_SAM_df:
             - require_wind_dir
@@ -892,23 +1538,25 @@ class WindX(WindResource, ResourceX):
             returned
         """
         ds_name = 'SAM_{}m'.format(hub_height)
-        if isinstance(gid, int):
+        if isinstance(gid, (int, np.integer)):
             gid = [gid, ]
 
-        SAM_df = []
-        for res_id in gid:
-            df = self._get_SAM_df(ds_name, res_id, **kwargs)
-            SAM_df.append(df)
-            if out_path is not None:
-                site_meta = self['meta', res_id]
-                self._to_SAM_csv(df, site_meta, out_path)
+        if len(gid) > 1:
+            SAM_df = self._get_SAM_df_batch(ds_name, gid, **kwargs)
+        else:
+            SAM_df = [self._get_SAM_df(ds_name, gid[0], **kwargs)]
+
+        if out_path is not None:
+            self._save_SAM_csvs(gid, SAM_df, out_path,
+                                max_workers=max_workers)
 
         if len(SAM_df) == 1:
             SAM_df = SAM_df[0]
 
         return SAM_df
 
-    def get_SAM_lat_lon(self, hub_height, lat_lon, out_path=None, **kwargs):
+    def get_SAM_lat_lon(self, hub_height, lat_lon, out_path=None,
+                        max_workers=None, **kwargs):
         """
         Extract time-series of all variables needed to run SAM for nearest
         site to given lat_lon and hub height
@@ -921,6 +1569,9 @@ class WindX(WindResource, ResourceX):
             Resource gid(s) of interset
         out_path : str, optional
             Path to save SAM data to in SAM .csv format, by default None
+        max_workers : int, optional
+            Number of threads to use to write SAM .csv files, None will use
+            up to 16 threads, by default None
         kwargs : dict
             Internal kwargs for _get_SAM_df:
             - require_wind_dir
@@ -934,7 +1585,8 @@ class WindX(WindResource, ResourceX):
             returned
         """
         gid = self.lat_lon_gid(lat_lon)
-        SAM_df = self.get_SAM_gid(hub_height, gid, out_path=out_path, **kwargs)
+        SAM_df = self.get_SAM_gid(hub_height, gid, out_path=out_path,
+                                  max_workers=max_workers, **kwargs)
 
         return SAM_df
 
@@ -943,7 +1595,8 @@ class MultiFileWindX(MultiFileWTK, WindX):
     """
     Multi-File Wind Resource extraction class
     """
-    def __init__(self, wtk_path, tree=None, unscale=True, str_decode=True):
+    def __init__(self, wtk_path, tree=None, unscale=True, str_decode=True,
+                 rdcc_nbytes=None, rdcc_nslots=None):
         """
         Parameters
         ----------
@@ -953,17 +1606,28 @@ class MultiFileWindX(MultiFileWTK, WindX):
                 /h5_dir/
                 /h5_dir/prefix*suffix
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
             Boolean flag to decode the bytestring meta data into normal
             strings. Setting this to False will speed up the meta data read.
-        """
-        super().__init__(wtk_path, unscale=unscale, str_decode=str_decode)
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
+        """
+        super().__init__(wtk_path, unscale=unscale, str_decode=str_decode,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class MultiYearWindX(MultiYearWindResource, MultiYearResourceX):
@@ -983,8 +1647,8 @@ class MultiYearWindX(MultiYearWindResource, MultiYearResourceX):
         years : list, optional
             List of years to access, by default None
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
@@ -998,6 +1662,9 @@ class MultiYearWindX(MultiYearWindResource, MultiYearResourceX):
                          str_decode=str_decode, hsds=hsds)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class WaveX(WaveResource, ResourceX):
@@ -1006,15 +1673,16 @@ class WaveX(WaveResource, ResourceX):
     """
 
     def __init__(self, wave_h5, tree=None, unscale=True, hsds=False,
-                 str_decode=True, group=None):
+                 str_decode=True, group=None, rdcc_nbytes=None,
+                 rdcc_nslots=None):
         """
         Parameters
         ----------
         wave_h5 : str
             Path to US_Wave .h5 file of interest
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         hsds : bool
@@ -1025,11 +1693,22 @@ class WaveX(WaveResource, ResourceX):
             strings. Setting this to False will speed up the meta data read.
         group : str
             Group within .h5 resource file to open
+        rdcc_nbytes : int, optional
+            Size of the raw data chunk cache for each dataset in bytes,
+            None defaults to RDCC_NBYTES (256 MB), by default None
+        rdcc_nslots : int, optional
+            Number of chunk slots in the raw data chunk cache, should be a
+            prime number, None defaults to RDCC_NSLOTS (12007),
+            by default None
         """
         super().__init__(wave_h5, unscale=unscale, hsds=hsds,
-                         str_decode=str_decode, group=group)
+                         str_decode=str_decode, group=group,
+                         rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
 
 
 class MultiYearWaveX(MultiYearWaveResource, MultiYearResourceX):
@@ -1050,8 +1729,8 @@ class MultiYearWaveX(MultiYearWaveResource, MultiYearResourceX):
         years : list, optional
             List of years to access, by default None
         tree : str | cKDTree
-            cKDTree or path to .pkl file containing pre-computed tree
-            of lat, lon coordinates
+            cKDTree or path to .npy, .npz or .pkl file containing
+            pre-computed tree of lat, lon coordinates
         unscale : bool
             Boolean flag to automatically unscale variables on extraction
         str_decode : bool
@@ -1065,3 +1744,6 @@ class MultiYearWaveX(MultiYearWaveResource, MultiYearResourceX):
                          str_decode=str_decode, hsds=hsds)
         self._lat_lon = None
         self._tree = tree
+        self._site_batch = None
+        self._region_groups = {}
+        self._grid = None
@@ -82,6 +82,8 @@ setup(
     extras_require={
         "test": test_requires,
         "dev": test_requires + ["flake8", "pre-commit", "pylint"],
+        "fsspec": ["fsspec>=2021.4.0"],
+        "hdf5plugin": ["hdf5plugin>=2.0"],
     },
     cmdclass={"develop": PostDevelopCommand},
 )
@@ -3,19 +3,27 @@
 pytests for  Rechunk h5
 """
 import h5py
+import hashlib
 import numpy as np
 import os
+import pandas as pd
 import pytest
+from tempfile import TemporaryDirectory
 
 from rex.resource import Resource
-from rex.rechunk_h5.rechunk_h5 import (get_dataset_attributes,
+from rex.resource_extraction import WindX
+from rex.rechunk_h5.rechunk_h5 import (RDCC_MAX_NSLOTS, get_aligned_size,
+                                       get_chunk_shape,
+                                       get_dataset_attributes, get_prime,
+                                       get_src_chunk_slices,
                                        to_records_array, RechunkH5)
 from rex import TESTDATADIR
+from rex.utilities.exceptions import ResourceKeyError
 
 PURGE_OUT = True
 
 
-def create_var_attrs(h5_file, t_chunk=(8 * 7 * 24)):
+def create_var_attrs(h5_file, t_chunk=None):
     """
     Create DataFrame for rechunk attributes
 
@@ -23,8 +31,9 @@ def create_var_attrs(h5_file, t_chunk=(8 * 7 * 24)):
     ----------
     h5_file : str
         Source .h5 file
-    t_chunk : int
-        Number of timesteps per chunk
+    t_chunk : int, optional
+        Number of timesteps per chunk, if None use get_chunk_shape to
+        compute ~1 MB chunks, by default None
 
     Returns
     -------
@@ -32,42 +41,118 @@ def create_var_attrs(h5_file, t_chunk=(8 * 7 * 24)):
         rechunk variable attributes
     """
     var_attrs = get_dataset_attributes(h5_file)
-    for var, _ in var_attrs.iterrows():
-        if var == 'time_index':
-            var_attrs.loc[var, 'dtype'] = 'S20'
-            var_attrs.at[var, 'attrs'] = {'freq': 'h', 'timezone': 'UTC'}
-        elif var == 'meta':
-            var_attrs.loc[var, 'chunks'] = None
-            var_attrs.loc[var, 'dtype'] = None
-        else:
-            var_attrs.loc[var, 'chunks'] = (t_chunk, 10)
+    # set chunks for all data rows at once, time_index and meta are the only
+    # rows that need individual updates
+    mask = ~var_attrs.index.isin(['time_index', 'meta'])
+    if t_chunk is None:
+        with h5py.File(h5_file, mode='r') as f:
+            chunks = [get_chunk_shape(f[var].shape, f[var].dtype.itemsize)
+                      for var in var_attrs.index[mask]]
+    else:
+        chunks = [(t_chunk, 10)] * mask.sum()
+
+    var_attrs.loc[mask, 'chunks'] = pd.Series(chunks,
+                                              index=var_attrs.index[mask])
+
+    var_attrs.at['time_index', 'dtype'] = 'S20'
+    var_attrs.at['time_index', 'attrs'] = {'freq': 'h', 'timezone': 'UTC'}
+    var_attrs.loc['meta', ['chunks', 'dtype']] = None
 
     return var_attrs
 
 
+def chunk_hashes(ds, selections):
+    """
+    Hash the decoded bytes of each chunk selection of ds
+
+    Parameters
+    ----------
+    ds : h5py.Dataset
+        Dataset to hash
+    selections : list
+        List of slice tuples, one per chunk
+
+    Returns
+    -------
+    hashes : dict
+        Dictionary mapping chunk origin to chunk hash
+    """
+    hashes = {}
+    for sel in selections:
+        origin = tuple(s.start for s in sel)
+        data = np.ascontiguousarray(ds[sel])
+        hashes[origin] = hashlib.blake2b(data.tobytes()).hexdigest()
+
+    return hashes
+
+
+def collect_dsets(h5):
+    """
+    Collect shape, dtype, and chunks for every dataset in h5 in a single
+    traversal
+
+    Parameters
+    ----------
+    h5 : h5py.File
+        Open .h5 file
+
+    Returns
+    -------
+    dsets : dict
+        Dictionary mapping dataset name to (shape, dtype, chunks)
+    """
+    dsets = {}
+
+    def collect(name, obj):
+        if isinstance(obj, h5py.Dataset):
+            dsets[name] = (obj.shape, obj.dtype.str, obj.chunks)
+
+    h5.visititems(collect)
+
+    return dsets
+
+
 def check_rechunk(src, dst, missing=None):
     """
     Compare src and dst .h5 files
     """
     with h5py.File(dst, mode='r') as f_dst:
         with h5py.File(src, mode='r') as f_src:
-            print(list(f_src))
-            for dset in f_dst:
-                assert dset in f_src
-                ds_dst = f_dst[dset]
-                ds_src = f_src[dset]
-                assert ds_dst.shape == ds_src.shape
+            src_dsets = collect_dsets(f_src)
+            dst_dsets = collect_dsets(f_dst)
+            assert set(dst_dsets) <= set(src_dsets)
+            for dset, (shape, dtype, chunks) in dst_dsets.items():
+                src_shape, src_dtype, src_chunks = src_dsets[dset]
+                assert shape == src_shape
                 if dset != 'time_index':
-                    assert ds_dst.dtype == ds_src.dtype
+                    assert dtype == src_dtype
 
-                chunks = ds_dst.chunks
                 if chunks is not None:
-                    assert chunks != ds_src.chunks
+                    assert chunks != src_chunks
+                    if dset != 'time_index':
+                        ds_dst = f_dst[dset]
+                        sels = list(ds_dst.iter_chunks())
+                        assert (chunk_hashes(ds_dst, sels)
+                                == chunk_hashes(f_src[dset], sels))
 
             if missing is not None:
-                for dset in missing:
-                    assert dset in f_src
-                    assert dset not in f_dst
+                missing = set(missing)
+                assert missing <= set(src_dsets)
+                assert not missing & set(dst_dsets)
+
+
+def test_dataset_attributes_cache():
+    """
+    Test that cached dataset attributes are not changed by callers
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    ds_attrs = get_dataset_attributes(path)
+    ds_attrs.at['windspeed_100m', 'attrs']['scale_factor'] = 1
+    ds_attrs.at['meta', 'chunks'] = 100
+
+    truth = get_dataset_attributes(path)
+    assert truth.at['windspeed_100m', 'attrs']['scale_factor'] == 100
+    assert truth.at['meta', 'chunks'] is None
 
 
 def test_to_records_array():
@@ -110,6 +195,315 @@ def test_rechunk_h5(drop):
         os.remove(rechunk_path)
 
 
+def test_chunk_shape():
+    """
+    Test chunk shape heuristic
+    """
+    chunks = get_chunk_shape((8784, 200), 2)
+    assert chunks == (2621, 200)
+
+    chunks = get_chunk_shape((8784, 200), 2, access='site_major')
+    assert chunks == (8784, 59)
+
+    chunks = get_chunk_shape((105120, 2488136), 4, target=8 * 1024**2)
+    assert chunks[0] == 1
+    assert np.prod(chunks) * 4 <= 8 * 1024**2
+
+    assert get_chunk_shape((10, 5), 4) == (10, 5)
+
+    with pytest.raises(ValueError):
+        get_chunk_shape((8784, 200), 2, access='diagonal')
+
+
+def test_rechunk_process_size():
+    """
+    Test RechunkH5 when processing the data in slabs of sites
+    """
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    rechunk_path = os.path.join(TESTDATADIR, 'wtk/rechunk.h5')
+    var_attrs = create_var_attrs(src_path, t_chunk=(8 * 7 * 24))
+
+    RechunkH5.run(src_path, rechunk_path, var_attrs, process_size=30,
+                  max_workers=4)
+
+    check_rechunk(src_path, rechunk_path)
+    with h5py.File(rechunk_path, mode='r') as f_dst:
+        with h5py.File(src_path, mode='r') as f_src:
+            for dset in var_attrs.index.drop(['time_index', 'meta']):
+                assert np.array_equal(f_dst[dset][...], f_src[dset][...])
+
+        ds = f_dst['windspeed_100m']
+        slices = get_src_chunk_slices(ds, 1, 15, dst_chunk=4)
+        assert slices[0][0] == 0
+        assert slices[-1][1] == ds.shape[1]
+        for (_, e), (s, _) in zip(slices[:-1], slices[1:]):
+            assert e == s
+            assert s % ds.chunks[1] == 0
+
+    # rechunk chunked source file
+    rechunk2_path = os.path.join(TESTDATADIR, 'wtk/rechunk2.h5')
+    var_attrs = create_var_attrs(rechunk_path, t_chunk=24)
+    RechunkH5.run(rechunk_path, rechunk2_path, var_attrs, process_size=15)
+
+    check_rechunk(rechunk_path, rechunk2_path)
+    with h5py.File(rechunk2_path, mode='r') as f_dst:
+        with h5py.File(src_path, mode='r') as f_src:
+            for dset in var_attrs.index.drop(['time_index', 'meta']):
+                assert np.array_equal(f_dst[dset][...], f_src[dset][...])
+
+    if PURGE_OUT:
+        os.remove(rechunk_path)
+        os.remove(rechunk2_path)
+
+
+def test_contiguous_src_slices():
+    """
+    Test that process slices of contiguous sources are not rounded up to the
+    destination chunk size
+    """
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with h5py.File(src_path, mode='r') as f:
+        ds = f['windspeed_100m']
+        assert ds.chunks is None
+        slices = get_src_chunk_slices(ds, 0, 100, dst_chunk=ds.shape[0])
+
+    assert len(slices) == int(np.ceil(ds.shape[0] / 100))
+    assert max(e - s for s, e in slices) == 100
+    assert slices[-1][1] == ds.shape[0]
+
+    assert get_aligned_size(100, dst_chunk=8784) == 100
+    assert get_aligned_size(100, src_chunk=30) == 120
+    assert get_aligned_size(100, src_chunk=30, dst_chunk=40) == 120
+    assert get_aligned_size(100, src_chunk=30, dst_chunk=8784) == 120
+
+
+def test_dst_dsets_closed():
+    """
+    Test that destination datasets, and their chunk caches, are released
+    once they have been copied
+    """
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    rechunk_path = os.path.join(TESTDATADIR, 'wtk/rechunk.h5')
+    var_attrs = create_var_attrs(src_path, t_chunk=(8 * 7 * 24))
+    dsets = var_attrs.drop(['time_index', 'meta'])
+
+    with RechunkH5(src_path, rechunk_path) as r:
+        copy_dset = r._copy_dset
+        n_open = []
+
+        def count_open(*args, **kwargs):
+            n_open.append(h5py.h5f.get_obj_count(r._dst_h5.id,
+                                                 h5py.h5f.OBJ_DATASET))
+            copy_dset(*args, **kwargs)
+
+        r._copy_dset = count_open
+        r.load_dsets(dsets, process_size=30)
+        assert n_open == [0] * len(dsets)
+
+        ds_out = r._open_dst_dset('windspeed_100m', axis=1)
+        nslots, nbytes, _ = ds_out.id.get_access_plist().get_chunk_cache()
+        assert nbytes <= RechunkH5.DST_RDCC_NBYTES
+        assert nslots <= get_prime(RDCC_MAX_NSLOTS)
+        del ds_out
+
+    with h5py.File(rechunk_path, mode='r') as f_dst:
+        with h5py.File(src_path, mode='r') as f_src:
+            for dset in dsets.index:
+                assert np.array_equal(f_dst[dset][...], f_src[dset][...])
+
+    if PURGE_OUT:
+        os.remove(rechunk_path)
+
+
+def test_large_src_chunk_slices():
+    """
+    Test that process slices of sources with chunks much larger than the
+    process size are not rounded up to whole source chunks
+    """
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, 'time_major.h5')
+        with h5py.File(path, mode='w') as f:
+            f.create_dataset('windspeed', shape=(8784, 50000),
+                             dtype='float32', chunks=(24, 50000))
+
+        with h5py.File(path, mode='r') as f:
+            slices = get_src_chunk_slices(f['windspeed'], 1, 100,
+                                          dst_chunk=10)
+
+    assert len(slices) == 500
+    assert max(e - s for s, e in slices) == 100
+    assert slices[-1][1] == 50000
+
+    assert get_aligned_size(100, src_chunk=50000) == 100
+    assert get_aligned_size(100, src_chunk=150) == 150
+
+
+def test_src_chunk_cache():
+    """
+    Test that source chunk caches are capped for large datasets
+    """
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, 'conus.h5')
+        with h5py.File(path, mode='w') as f:
+            f.create_dataset('windspeed', shape=(8784, 2488136),
+                             dtype='float32', chunks=(8784, 32))
+            f.create_dataset('pressure', shape=(8784, 2488136),
+                             dtype='int16', chunks=(2928, 500))
+
+        with h5py.File(path, mode='r') as f:
+            for dset in ['windspeed', 'pressure']:
+                ds = RechunkH5._open_src_dset(f, dset)
+                chunk_bytes = np.prod(ds.chunks) * ds.dtype.itemsize
+                nbytes = ds.id.get_access_plist().get_chunk_cache()[1]
+                assert nbytes <= RechunkH5.SRC_RDCC_NBYTES
+                assert nbytes >= chunk_bytes
+                del ds
+
+
+def test_memmap_src_dset():
+    """
+    Test memory mapping of contiguous source datasets
+    """
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with h5py.File(src_path, mode='r') as f:
+        src_mmap = RechunkH5._memmap_src_dset(f['windspeed_100m'])
+        assert isinstance(src_mmap, np.memmap)
+        assert np.array_equal(src_mmap, f['windspeed_100m'][...])
+        del src_mmap
+
+        assert RechunkH5._memmap_src_dset(f['meta']) is None
+
+    rechunk_path = os.path.join(TESTDATADIR, 'wtk/rechunk.h5')
+    var_attrs = create_var_attrs(src_path)
+    RechunkH5.run(src_path, rechunk_path, var_attrs)
+    with h5py.File(rechunk_path, mode='r') as f:
+        assert RechunkH5._memmap_src_dset(f['windspeed_100m']) is None
+
+    if PURGE_OUT:
+        os.remove(rechunk_path)
+
+
+def test_rechunk_compression():
+    """
+    Test RechunkH5 with compression
+    """
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    rechunk_path = os.path.join(TESTDATADIR, 'wtk/rechunk.h5')
+    var_attrs = create_var_attrs(src_path)
+    var_attrs['compression'] = None
+    var_attrs['compression_opts'] = None
+    dsets = ['windspeed_100m', 'temperature_100m']
+    var_attrs.loc[dsets, 'compression'] = 'gzip'
+    var_attrs.loc[dsets, 'compression_opts'] = 4
+
+    RechunkH5.run(src_path, rechunk_path, var_attrs)
+
+    check_rechunk(src_path, rechunk_path)
+    with h5py.File(rechunk_path, mode='r') as f:
+        for dset in var_attrs.index.drop(['time_index', 'meta']):
+            if dset in dsets:
+                assert f[dset].compression == 'gzip'
+                assert f[dset].compression_opts == 4
+            else:
+                assert f[dset].compression is None
+
+    if PURGE_OUT:
+        os.remove(rechunk_path)
+
+
+def test_rechunk_blosc():
+    """
+    Test RechunkH5 with Blosc compression from hdf5plugin
+    """
+    hdf5plugin = pytest.importorskip('hdf5plugin')
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    var_attrs = create_var_attrs(src_path)
+    var_attrs['compression'] = None
+    var_attrs['compression_opts'] = None
+    dsets = ['windspeed_100m', 'temperature_100m']
+    var_attrs.loc[dsets, 'compression'] = 'blosc:zstd'
+    var_attrs.loc[dsets, 'compression_opts'] = 4
+
+    with TemporaryDirectory() as td:
+        rechunk_path = os.path.join(td, 'rechunk.h5')
+        RechunkH5.run(src_path, rechunk_path, var_attrs)
+
+        check_rechunk(src_path, rechunk_path)
+        with h5py.File(rechunk_path, mode='r') as f:
+            for dset in dsets:
+                dcpl = f[dset].id.get_create_plist()
+                assert dcpl.get_nfilters() == 1
+                assert dcpl.get_filter(0)[0] == hdf5plugin.Blosc.filter_id
+
+
+def test_blosc_compression_opts():
+    """
+    Test that Blosc compression rejects non-clevel compression_opts
+    """
+    with pytest.raises(ValueError):
+        RechunkH5._get_compression_kwargs('blosc:lz4',
+                                          compression_opts=(0, 0, 0, 0, 5))
+
+
+def test_rechunk_columnar_meta():
+    """
+    Test RechunkH5 writing meta as a group of column datasets
+    """
+    src_path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    rechunk_path = os.path.join(TESTDATADIR, 'wtk/rechunk.h5')
+    var_attrs = create_var_attrs(src_path)
+
+    RechunkH5.run(src_path, rechunk_path, var_attrs, columnar_meta=True)
+
+    with h5py.File(rechunk_path, mode='r') as f:
+        assert 'meta' not in f
+        assert Resource.META_COLUMNS in f
+
+    with WindX(src_path) as f_src:
+        with WindX(rechunk_path) as f_dst:
+            assert 'meta' in f_dst.datasets
+            assert f_dst.shape == f_src.shape
+            assert np.allclose(f_dst.lat_lon, f_src.lat_lon)
+            pd.testing.assert_frame_equal(f_dst.meta, f_src.meta)
+            pd.testing.assert_frame_equal(f_dst['meta', 10:20],
+                                          f_src['meta', 10:20])
+            for dset in var_attrs.index.drop(['time_index', 'meta']):
+                assert np.array_equal(f_dst[dset], f_src[dset])
+
+            assert f_dst.get_attrs('meta') == f_src.get_attrs('meta')
+            shape, dtype, chunks = f_dst.get_dset_properties('meta')
+            src_shape, src_dtype, _ = f_src.get_dset_properties('meta')
+            assert shape == src_shape
+            assert dtype.names == src_dtype.names
+            assert chunks is not None
+            with pytest.raises(ResourceKeyError):
+                f_dst.open_dataset('meta')
+
+    ds_attrs = get_dataset_attributes(rechunk_path)
+    assert 'meta' in ds_attrs.index
+    assert Resource.META_COLUMNS not in ds_attrs.index
+
+    # rechunk columnar meta source back to a single meta dataset
+    rechunk2_path = os.path.join(TESTDATADIR, 'wtk/rechunk2.h5')
+    var_attrs = create_var_attrs(rechunk_path)
+    RechunkH5.run(rechunk_path, rechunk2_path, var_attrs)
+
+    with h5py.File(rechunk2_path, mode='r') as f:
+        assert 'meta' in f
+        assert Resource.META_COLUMNS not in f
+
+    with WindX(src_path) as f_src:
+        with WindX(rechunk2_path) as f_dst:
+            pd.testing.assert_frame_equal(f_dst.meta, f_src.meta)
+            assert np.allclose(f_dst.lat_lon, f_src.lat_lon)
+            for dset in var_attrs.index.drop(['time_index', 'meta']):
+                assert np.array_equal(f_dst[dset], f_src[dset])
+
+    if PURGE_OUT:
+        os.remove(rechunk_path)
+        os.remove(rechunk2_path)
+
+
 def test_downscale():
     """
     Test downscaling resolution during RechunkH5
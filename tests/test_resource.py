@@ -6,6 +6,7 @@ from datetime import datetime
 import numpy as np
 import os
 import pandas as pd
+from pathlib import Path
 import pytest
 
 from rex import TESTDATADIR
@@ -658,6 +659,83 @@ class TestMultiFileWTK:
         FiveMinWind_res.close()
 
 
+def test_fsspec_url():
+    """
+    Test opening a resource file from a URL through fsspec
+    """
+    pytest.importorskip('fsspec')
+    from rex.resource_extraction import WindX
+
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    url = 'file://' + os.path.abspath(path)
+    with WindResource(path) as truth:
+        with WindResource(url) as test:
+            assert test._fs_open is not None
+            assert test.datasets == truth.datasets
+            assert test.shape == truth.shape
+            assert test.time_index.equals(truth.time_index)
+            pd.testing.assert_frame_equal(test.meta, truth.meta)
+            for dset in ['windspeed_100m', 'temperature_100m']:
+                assert np.array_equal(test[dset], truth[dset])
+                assert np.array_equal(test[dset, :, 10:20],
+                                      truth[dset, :, 10:20])
+
+    assert not test._fs_open.fobjects
+
+    with WindX(path) as truth:
+        with WindX(url) as test:
+            gid = truth.lat_lon_gid(truth.lat_lon[5])
+            assert test.lat_lon_gid(truth.lat_lon[5]) == gid
+            assert np.array_equal(test.get_gid_ts('windspeed_100m', gid),
+                                  truth.get_gid_ts('windspeed_100m', gid))
+
+
+def test_multi_file_chunk_cache():
+    """
+    Test raw data chunk cache overrides on multi-file handlers
+    """
+    from rex.resource_extraction import MultiFileNSRDBX, MultiFileWindX
+
+    nbytes = 1024**2
+    nslots = 521
+    paths = {MultiFileWTK: os.path.join(TESTDATADIR, 'wtk', 'wtk*m.h5'),
+             MultiFileWindX: os.path.join(TESTDATADIR, 'wtk', 'wtk*m.h5'),
+             MultiFileNSRDB: os.path.join(TESTDATADIR, 'nsrdb',
+                                          'nsrdb*2018.h5'),
+             MultiFileNSRDBX: os.path.join(TESTDATADIR, 'nsrdb',
+                                           'nsrdb*2018.h5')}
+    for res_cls, path in paths.items():
+        with res_cls(path, rdcc_nbytes=nbytes, rdcc_nslots=nslots) as f:
+            for h5 in f._h5._h5_map.values():
+                cache = h5.id.get_access_plist().get_cache()
+                assert cache[1:3] == (nslots, nbytes)
+
+        with res_cls(path) as f:
+            for h5 in f._h5._h5_map.values():
+                cache = h5.id.get_access_plist().get_cache()
+                assert cache[1:3] == (res_cls.RDCC_NSLOTS,
+                                      res_cls.RDCC_NBYTES)
+
+
+def test_pathlib_path():
+    """
+    Test opening resource files from pathlib.Path instances
+    """
+    from rex.resource_extraction import WindX
+
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindResource(path) as truth:
+        with WindResource(Path(path)) as test:
+            assert test.shape == truth.shape
+            pd.testing.assert_frame_equal(test.meta, truth.meta)
+            assert np.array_equal(test['windspeed_100m'],
+                                  truth['windspeed_100m'])
+
+    with WindX(Path(path)) as f:
+        gid = f.lat_lon_gid(f.lat_lon[5])
+        assert gid == 5
+
+
 def execute_pytest(capture='all', flags='-rapP'):
     """Execute module as pytest with detailed summary report.
 
@@ -2,14 +2,18 @@
 """
 pytests for resource extractors
 """
+import h5py
 import numpy as np
 import os
 import pandas as pd
 import pytest
+from scipy.spatial import cKDTree
+from tempfile import TemporaryDirectory
 
 from rex.resource_extraction import (MultiFileWindX, MultiFileNSRDBX,
-                                     NSRDBX, WindX)
-from rex.resource_extraction.resource_extraction import TREE_DIR
+                                     MultiYearWindX, NSRDBX, WindX)
+from rex.resource import ResourceDataset
+from rex.resource_extraction.resource_extraction import ResourceX, TREE_DIR
 from rex import TESTDATADIR
 
 
@@ -331,6 +335,302 @@ class TestMultiFileWindX:
         MultiFileWindX_cls.close()
 
 
+def test_gid_order():
+    """
+    Test that unsorted gids are returned in the order requested
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    gids = [150, 3, 75, 4, 199]
+    with WindX(path) as f:
+        truth = np.stack([f['windspeed_100m', :, gid] for gid in gids],
+                         axis=1)
+        test = f.get_gid_ts('windspeed_100m', gids)
+        assert np.allclose(test, truth)
+
+        test = f.get_gid_df('windspeed_100m', gids)
+        assert np.all(test.columns.values == gids)
+        assert np.allclose(test.values, truth)
+
+
+def test_SAM_batch():
+    """
+    Test that batched SAM extraction matches single site extraction
+    """
+    gids = [7, 3, 42]
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindX(path) as f:
+        SAM_dfs = f.get_SAM_gid(100, gids)
+        for gid, test in zip(gids, SAM_dfs):
+            truth = f.get_SAM_gid(100, gid)
+            assert test.name == truth.name
+            assert test.equals(truth)
+
+    path = os.path.join(TESTDATADIR, 'nsrdb/ri_100_nsrdb_2012.h5')
+    with NSRDBX(path) as f:
+        SAM_dfs = f.get_SAM_gid(gids)
+        for gid, test in zip(gids, SAM_dfs):
+            truth = f.get_SAM_gid(gid)
+            assert test.name == truth.name
+            assert test.equals(truth)
+
+
+def test_SAM_batch_read_shape(monkeypatch):
+    """
+    Test that batched SAM extraction of distant gids doesn't read all of
+    the sites between them
+    """
+    shapes = []
+    read_direct = ResourceDataset._read_direct
+
+    def record_shape(self, slices):
+        out = read_direct(self, slices)
+        shapes.append(out.shape)
+        return out
+
+    monkeypatch.setattr(ResourceDataset, '_read_direct', record_shape)
+
+    gids = [0, 199, 190]
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindX(path) as f:
+        SAM_dfs = f.get_SAM_gid(100, gids)
+        data_shapes = [shape for shape in shapes
+                       if len(shape) == 2 and shape[0] == f.shape[0]]
+        assert data_shapes
+        assert max(shape[1] for shape in data_shapes) == 10
+
+        for gid, test in zip(gids, SAM_dfs):
+            assert test.equals(f.get_SAM_gid(100, gid))
+
+
+def test_SAM_csv():
+    """
+    Test writing SAM DataFrames to SAM .csv files
+    """
+    gids = [7, 3]
+    path = os.path.join(TESTDATADIR, 'nsrdb/ri_100_nsrdb_2012.h5')
+    with TemporaryDirectory() as td:
+        with NSRDBX(path) as f:
+            SAM_dfs = f.get_SAM_gid(gids, out_path=td)
+            meta = f['meta', gids]
+
+        for gid, truth in zip(gids, SAM_dfs):
+            out_path = os.path.join(td, '{}.csv'.format(truth.name))
+            header = pd.read_csv(out_path, nrows=1)
+            assert header['Location ID'].values[0] == gid
+            assert np.isclose(header['Latitude'].values[0],
+                              meta.loc[gid, 'latitude'])
+
+            test = pd.read_csv(out_path, skiprows=2)
+            assert np.all(test.columns == truth.columns)
+            assert np.allclose(test.values, truth.values)
+
+        # sites saved to a single .csv file are written serially so the file
+        # always contains the last site
+        out_path = os.path.join(td, 'sites.csv')
+        with NSRDBX(path) as f:
+            SAM_dfs = f.get_SAM_gid(gids, out_path=out_path, max_workers=2)
+
+        header = pd.read_csv(out_path, nrows=1)
+        assert header['Location ID'].values[0] == gids[-1]
+        test = pd.read_csv(out_path, skiprows=2)
+        assert np.allclose(test.values, SAM_dfs[-1].values)
+
+
+def test_tree_cache():
+    """
+    Test that trees are shared between instances and years of the same
+    dataset
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindX(path) as f:
+        tree = f.tree
+
+    with WindX(path) as f:
+        assert f.tree is tree
+
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2013.h5')
+    with WindX(path) as f:
+        assert f.tree is tree
+
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_20*.h5')
+    with MultiYearWindX(path) as f:
+        assert f.tree is tree
+
+    with TemporaryDirectory() as td:
+        tree_path = os.path.join(td, 'tree.npy')
+        ResourceX._save_tree(tree, tree_path)
+        with WindX(path.replace('20*', '2012'), tree=tree_path) as f:
+            tree = f.tree
+
+        with WindX(path.replace('20*', '2013'), tree=tree_path) as f:
+            assert f.tree is tree
+
+
+def test_gid_ts_struct():
+    """
+    Test extracting timeseries as GidTS namedtuples instead of DataFrames
+    """
+    path = os.path.join(TESTDATADIR, 'nsrdb/ri_100_nsrdb_2012.h5')
+    with NSRDBX(path) as f:
+        gids = [5, 3, 9]
+        truth = f.get_gid_df('ghi', gids)
+        test = f.get_gid_df('ghi', gids, as_frame=False)
+        assert test.gid == gids
+        assert test.time_index is f.time_index
+        assert np.array_equal(test.values, truth.values)
+
+        region = f.meta['county'].iloc[0]
+        truth = f.get_region_df('ghi', region, region_col='county')
+        test = f.get_region_df('ghi', region, region_col='county',
+                               as_frame=False)
+        assert np.array_equal(test.gid, truth.columns)
+        assert np.array_equal(test.values, truth.values)
+
+
+def test_region_df_chunked():
+    """
+    Test that chunked region extraction matches the full region DataFrame
+    """
+    path = os.path.join(TESTDATADIR, 'nsrdb/ri_100_nsrdb_2012.h5')
+    with NSRDBX(path) as f:
+        region = f.meta['county'].iloc[0]
+        truth = f.get_region_df('ghi', region, region_col='county')
+        dfs = list(f.get_region_df_chunked('ghi', region,
+                                           region_col='county',
+                                           chunk_rows=1000))
+
+    assert len(dfs) > 1
+    test = pd.concat(dfs)
+    assert test.equals(truth)
+
+
+def test_save_tree():
+    """
+    Test saving tree to .npz and loading it back
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with TemporaryDirectory() as td:
+        tree_path = os.path.join(td, 'tree.npz')
+        with WindX(path) as f:
+            truth = f.tree
+            ResourceX.save_tree(truth, tree_path)
+
+        with WindX(path, tree=tree_path) as f:
+            tree = f.tree
+
+    assert tree is not truth
+    assert tree.leafsize == truth.leafsize
+    assert np.array_equal(tree.data, truth.data)
+
+
+def test_nearest_site():
+    """
+    Test batched k nearest site lookup
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindX(path) as f:
+        coords = f.lat_lon[::10] + 0.001
+        gids = f.nearest_site(coords)
+        assert np.array_equal(gids, f.lat_lon_gid(coords))
+        assert np.array_equal(f.nearest_site(coords[0]), gids[:1])
+
+        gids = f.nearest_site(coords, k=3)
+        assert gids.shape == (len(coords), 3)
+        _, truth = f.tree.query(coords, k=3)
+        assert np.array_equal(gids, truth)
+
+
+def test_grid_gid():
+    """
+    Test nearest gid lookup on a regular grid against the cKDTree
+    """
+    lats, lons = np.meshgrid(np.arange(30, 40, 0.04),
+                             np.arange(-90, -80, 0.04), indexing='ij')
+    lat_lon = np.dstack((lats.ravel(), lons.ravel()))[0]
+    order = np.random.permutation(len(lat_lon))
+    lat_lon = lat_lon[order]
+
+    grid = ResourceX._get_grid(lat_lon)
+    assert grid is not None
+    assert ResourceX._get_grid(lat_lon[1:]) is None
+
+    coords = np.random.uniform((29, -91), (41, -79), size=(1000, 2))
+    gids = ResourceX._grid_query(grid, coords)
+    _, truth = cKDTree(lat_lon).query(coords)
+    assert np.allclose(np.linalg.norm(lat_lon[gids] - coords, axis=1),
+                       np.linalg.norm(lat_lon[truth] - coords, axis=1))
+
+    gid = ResourceX._grid_query(grid, lat_lon[10])
+    assert gid == 10
+
+
+def test_grid_cache():
+    """
+    Test that the grid check is cached so that re-opened files do not
+    re-read the coordinates, and that no tree is built for gridded files
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindX(path) as f:
+        lat_lon = f.lat_lon
+        truth = f.lat_lon_gid(lat_lon[::7] + 0.01)
+        grid = f.grid
+
+    with WindX(path) as f:
+        gids = f.lat_lon_gid(lat_lon[::7] + 0.01)
+        assert f._lat_lon is None
+        assert f.grid is grid
+
+    assert np.array_equal(gids, truth)
+
+    lats, lons = np.meshgrid(np.arange(40, 41, 0.1), np.arange(-80, -79, 0.1),
+                             indexing='ij')
+    meta = np.rec.fromarrays([lats.ravel(), lons.ravel()],
+                             names=['latitude', 'longitude'])
+    time_index = pd.date_range('2012-01-01', periods=24, freq='h')
+    with TemporaryDirectory() as td:
+        path = os.path.join(td, 'grid_test.h5')
+        with h5py.File(path, mode='w') as f:
+            f['meta'] = meta
+            f['time_index'] = time_index.astype(str).values.astype('S20')
+
+        coords = np.random.uniform((40, -80), (41, -79), size=(100, 2))
+        with ResourceX(path) as f:
+            gids = f.lat_lon_gid(coords)
+            assert f.grid is not None
+            assert not isinstance(f._tree, cKDTree)
+            assert f._get_tree_file(path) not in os.listdir(TREE_DIR.name)
+
+            f.lat_lon_gid(coords, metric='haversine')
+            assert isinstance(f._tree, cKDTree)
+
+    _, truth = cKDTree(np.dstack((meta['latitude'],
+                                  meta['longitude']))[0]).query(coords)
+    assert np.array_equal(gids, truth)
+
+
+def test_haversine_gid():
+    """
+    Test nearest gid lookup by great-circle distance against brute force
+    """
+    path = os.path.join(TESTDATADIR, 'wtk/ri_100_wtk_2012.h5')
+    with WindX(path) as f:
+        lat_lon = f.lat_lon
+        coords = f.lat_lon[::7] + 0.01
+        gids = f.lat_lon_gid(coords, metric='haversine')
+        gid = f.lat_lon_gid(coords[0], metric='haversine')
+        with pytest.raises(ValueError):
+            f.lat_lon_gid(coords, metric='manhattan')
+
+    lat1, lon1 = np.radians(coords).T[:, :, None]
+    lat2, lon2 = np.radians(lat_lon.astype(np.float64)).T[:, None, :]
+    dist = (np.sin((lat2 - lat1) / 2)**2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2)
+    truth = np.argmin(dist, axis=1)
+
+    assert np.array_equal(gids, truth)
+    assert gid == truth[0]
+
+
 def execute_pytest(capture='all', flags='-rapP'):
     """Execute module as pytest with detailed summary report.
 